@@ -4,9 +4,9 @@ pragma solidity ^0.8.4;
 
 // make changes to the brownie config to import these libraries
 import "@chirulabs/contracts/ERC721A.sol";
-import "@openzeppelin/contracts/utils/Counters.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 import "@chainlink/contracts/src/v0.8/interfaces/AggregatorV3Interface.sol";
 
 interface FreeMintContracts {
@@ -14,37 +14,72 @@ interface FreeMintContracts {
 }
 
 contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
-    using Counters for Counters.Counter;
+    // The mint config never changes after the contract is deployed, so it is
+    // kept in the bytecode (immutable/constant) rather than in storage slots
+    AggregatorV3Interface public immutable priceFeed;
 
-    Counters.Counter private _tokenIds;
-    AggregatorV3Interface public priceFeed;
+    int256 public immutable max_supply;
+    int256 public constant max_batch = 5;
+    int256 public constant max_batch_wl = 2;
+    int256 public constant max_batch_free_mint_wl = 2;
 
-    int256 public max_supply = 0;
-    int256 public max_batch = 5;
-    int256 public max_batch_wl = 2;
-    int256 public max_batch_free_mint_wl = 2;
-
-    int256 public mint_price = 0;
-    int256 public mint_price_whitlist = 0;
-    int256 public mint_price_both_free_mints = 0;
+    int256 public immutable mint_price;
+    int256 public immutable mint_price_whitlist;
+    int256 public constant mint_price_both_free_mints = 0; // Community member? = FREE MINT!!!
 
+    // Packed into one slot
     bool public prereveal = true;
+    bool public marketing_has_withdrawn = false;
 
     string private IPFS_JSON_Folder;
     string public IPFS_prereveal_JSON_Folder;
 
-    FreeMintContracts public accessories_address;
-    FreeMintContracts public accommodation_address;
+    string private constant ipfs_gateway = "https://ipfs.io/ipfs/";
+    // The whole base URI of the folder in use, built when it changes rather
+    // than on every tokenURI() call
+    string private base_uri;
 
-    bool public marketing_has_withdrawn = false;
+    event BaseURIChanged(string base_uri);
+
+    FreeMintContracts public immutable accessories_address;
+    FreeMintContracts public immutable accommodation_address;
+
+    address public immutable marketing_address;
+    uint256 public constant marketing_budget_in_ETH = 10 * 10 ** 18;
+
+    // Whether an address is on the whitelist and whether it has used its
+    // whitelist / free mint price are kept in the same slot
+    struct WhiteListEntry {
+        bool listed;
+        bool used;
+    }
+
+    mapping(address => WhiteListEntry) private whitelist_entries;
+
+    // An alternative to the whitelist mapping for large whitelists.
+    // Built by scripts/merkle_whitelist.py (leaf = keccak256(address))
+    bytes32 public whitelist_merkle_root;
 
-    address public marketing_address;
-    uint256 public marketing_budget_in_ETH = 10 * 10 ** 18;
+    // Once set, the free mint price goes to the addresses on this root
+    // (holders of both free mints at a block, built by
+    // scripts/free_mint_snapshot.py) and the free mint contracts are no
+    // longer called when minting
+    bytes32 public free_mint_merkle_root;
 
-    mapping(address => bool) public whitelist;
-    mapping(address => bool) public whitelist_used;
+    uint256 public constant btc_price_in_usd = 20000 * 10 ** 8;
 
-    uint256 public btc_price_in_usd = 20000 * 10 ** 8;
+    // The last price feed answer and when it was read, packed into one slot.
+    // mint() only asks the price feed again once it was read more than
+    // btc_price_cache_window seconds ago.
+    uint128 public cached_btc_price;
+    uint64 public cached_btc_price_read_at;
+    uint64 public btc_price_cache_window = 10 minutes;
+
+    enum MintTier {
+        Normal,
+        WhiteList,
+        BothFreeMints
+    }
 
     /*
      * This needs to be the 46 alphanumeric string in the ipfs URL
@@ -78,13 +113,13 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
         priceFeed = AggregatorV3Interface(_priceFeed);
         IPFS_JSON_Folder = _IPFS_JSON_Folder;
         IPFS_prereveal_JSON_Folder = _IPFS_prereveal_JSON_Folder;
+        _set_base_uri(_build_base_uri(_IPFS_prereveal_JSON_Folder));
         marketing_address = _marketing_address;
         accessories_address = FreeMintContracts(_accessories_address);
         accommodation_address = FreeMintContracts(_accommodation_address);
         max_supply = _max_supply;
         mint_price = _mint_price;
         mint_price_whitlist = _mint_price_whitlist;
-        mint_price_both_free_mints = 0; // Community member? = FREE MINT!!!
     }
 
     /**
@@ -92,12 +127,20 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
      * token will be the concatenation of the 'baseURI' and the 'tokenId'
      */
     function _baseURI() internal view virtual override returns (string memory) {
-        string memory JSON_Folder = IPFS_prereveal_JSON_Folder;
-        if (prereveal == false) {
-            JSON_Folder = IPFS_JSON_Folder;
-        }
-        return
-            string(abi.encodePacked("https://ipfs.io/ipfs/", JSON_Folder, "/"));
+        return base_uri;
+    }
+
+    function _build_base_uri(string memory _JSON_Folder)
+        internal
+        pure
+        returns (string memory)
+    {
+        return string(abi.encodePacked(ipfs_gateway, _JSON_Folder, "/"));
+    }
+
+    function _set_base_uri(string memory _base_uri) internal {
+        base_uri = _base_uri;
+        emit BaseURIChanged(_base_uri);
     }
 
     function mint() public payable returns (uint256) {
@@ -109,10 +152,41 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
     // The tokenURI is the location of the JSON files (without the .json extension)
     // (Example: https://ipfs.io/ipfs/QmdRoeMsnbQrQXB8j4Q8iGzN14a65R1PahVPoZhJhw3KtG/2)
     function mint(uint256 _num_nfts) public payable returns (uint256) {
-        require(getBTCPrice() < btc_price_in_usd, "BTC is not under 20k usd");
+        return _mint_nfts(_num_nfts, new bytes32[](0), new bytes32[](0));
+    }
 
+    // For accounts on the merkle root whitelist
+    function mint(uint256 _num_nfts, bytes32[] calldata _proof)
+        public
+        payable
+        returns (uint256)
+    {
+        return _mint_nfts(_num_nfts, _proof, new bytes32[](0));
+    }
+
+    // For accounts on the free mint snapshot (the whitelist proof can be empty)
+    function mint(
+        uint256 _num_nfts,
+        bytes32[] calldata _proof,
+        bytes32[] calldata _free_mint_proof
+    ) public payable returns (uint256) {
+        return _mint_nfts(_num_nfts, _proof, _free_mint_proof);
+    }
+
+    function _mint_nfts(
+        uint256 _num_nfts,
+        bytes32[] memory _proof,
+        bytes32[] memory _free_mint_proof
+    ) internal returns (uint256) {
         require(
-            mint_cost(int(_num_nfts)) <= int256(msg.value),
+            _getCachedBTCPrice() < btc_price_in_usd,
+            "BTC is not under 20k usd"
+        );
+
+        // The pricing tier is only worked out once per mint
+        MintTier tier = _mint_tier(msg.sender, _proof, _free_mint_proof);
+        require(
+            _mint_cost(tier, int(_num_nfts)) <= int256(msg.value),
             "More ETH required to mint"
         );
 
@@ -121,12 +195,13 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
         // 0 > 699 = 700
         require(newItemId < uint256(max_supply - 1), "All genesis NFTs minted");
 
-        _safeMint(msg.sender, _num_nfts);
-
-        if (isInWhiteList(msg.sender) || ownsBothFreeMints(msg.sender)) {
-            whitelist_used[msg.sender] = true;
+        // Set before _safeMint so the price can't be reused by re-entering
+        if (tier != MintTier.Normal) {
+            whitelist_entries[msg.sender].used = true;
         }
 
+        _safeMint(msg.sender, _num_nfts);
+
         return newItemId;
     }
 
@@ -135,17 +210,84 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
     }
 
     function mint_cost(int256 _num_nfts) public view returns (int256) {
-        if (
-            ownsBothFreeMints(msg.sender) && whitelist_used[msg.sender] == false
-        ) {
+        return
+            _mint_cost(
+                _mint_tier(msg.sender, new bytes32[](0), new bytes32[](0)),
+                _num_nfts
+            );
+    }
+
+    function mint_cost(int256 _num_nfts, bytes32[] calldata _proof)
+        public
+        view
+        returns (int256)
+    {
+        return
+            _mint_cost(
+                _mint_tier(msg.sender, _proof, new bytes32[](0)),
+                _num_nfts
+            );
+    }
+
+    function mint_cost(
+        int256 _num_nfts,
+        bytes32[] calldata _proof,
+        bytes32[] calldata _free_mint_proof
+    ) public view returns (int256) {
+        return
+            _mint_cost(
+                _mint_tier(msg.sender, _proof, _free_mint_proof),
+                _num_nfts
+            );
+    }
+
+    // mint_cost() for any address, as msg.sender is the Multicall contract
+    // when the mint site reads the price for many addresses at once
+    function mint_cost_for(address _addr, int256 _num_nfts)
+        public
+        view
+        returns (int256)
+    {
+        return
+            _mint_cost(
+                _mint_tier(_addr, new bytes32[](0), new bytes32[](0)),
+                _num_nfts
+            );
+    }
+
+    // Free mint holders before the whitelist, and each only until the address
+    // has used its discounted mint. The free mint contracts are only called
+    // (and the proofs only checked) when they can still make a difference.
+    function _mint_tier(
+        address _addr,
+        bytes32[] memory _proof,
+        bytes32[] memory _free_mint_proof
+    ) internal view returns (MintTier) {
+        WhiteListEntry memory entry = whitelist_entries[_addr];
+        if (entry.used) {
+            return MintTier.Normal;
+        }
+        if (_hasBothFreeMints(_addr, _free_mint_proof)) {
+            return MintTier.BothFreeMints;
+        }
+        if (entry.listed || _isInMerkleWhiteList(_addr, _proof)) {
+            return MintTier.WhiteList;
+        }
+        return MintTier.Normal;
+    }
+
+    function _mint_cost(MintTier _tier, int256 _num_nfts)
+        internal
+        view
+        returns (int256)
+    {
+        if (_tier == MintTier.BothFreeMints) {
             require(
                 _num_nfts <= max_batch_free_mint_wl,
                 "You can not mint that many NFTs (2)"
             );
             return mint_price_both_free_mints * _num_nfts;
-        } else if (
-            isInWhiteList(msg.sender) && whitelist_used[msg.sender] == false
-        ) {
+        } else if (_tier == MintTier.WhiteList) {
             require(
                 _num_nfts <= max_batch_wl,
                 "You can not mint that many NFTs (1)"
@@ -165,24 +307,142 @@ contract PoorApes is ERC721A, Ownable, ReentrancyGuard {
         return uint256(answer);
     }
 
+    function _getCachedBTCPrice() internal returns (uint256) {
+        if (
+            block.timestamp <
+            uint256(cached_btc_price_read_at) + btc_price_cache_window
+        ) {
+            return cached_btc_price;
+        }
+        (, int256 answer, , , ) = priceFeed.latestRoundData();
+        cached_btc_price = uint128(uint256(answer));
+        // The time it was read, not the round's updatedAt: the feed only
+        // updates about once an hour, so a window measured from updatedAt
+        // would have run out for most of each round
+        cached_btc_price_read_at = uint64(block.timestamp);
+        return uint256(answer);
+    }
+
+    function setBTCPriceCacheWindow(uint64 _seconds) public onlyOwner {
+        btc_price_cache_window = _seconds;
+    }
+
     function addToWhiteList(address _addr) public onlyOwner {
         require(
             _addr != owner(),
             "The owner can not be added to the whitelist"
         );
-        whitelist[_addr] = true;
+        whitelist_entries[_addr].listed = true;
     }
 
     function removeFromWhiteList(address _addr) public onlyOwner {
-        whitelist[_addr] = false;
+        whitelist_entries[_addr].listed = false;
+    }
+
+    // Loading a large whitelist one address per transaction is slow & costly
+    function addManyToWhiteList(address[] calldata _addrs) public onlyOwner {
+        address contract_owner = owner();
+        for (uint256 i = 0; i < _addrs.length; i++) {
+            require(
+                _addrs[i] != contract_owner,
+                "The owner can not be added to the whitelist"
+            );
+            whitelist_entries[_addrs[i]].listed = true;
+        }
+    }
+
+    function removeManyFromWhiteList(address[] calldata _addrs)
+        public
+        onlyOwner
+    {
+        for (uint256 i = 0; i < _addrs.length; i++) {
+            whitelist_entries[_addrs[i]].listed = false;
+        }
+    }
+
+    function setWhiteListMerkleRoot(bytes32 _root) public onlyOwner {
+        whitelist_merkle_root = _root;
+    }
+
+    // 0 goes back to asking the free mint contracts
+    function setFreeMintMerkleRoot(bytes32 _root) public onlyOwner {
+        free_mint_merkle_root = _root;
     }
 
     function disablePrereveal() public onlyOwner {
         prereveal = false;
+        _set_base_uri(_build_base_uri(IPFS_JSON_Folder));
+    }
+
+    // To move the metadata to another gateway or host. disablePrereveal()
+    // goes back to the IPFS folder, so call this after it.
+    function setBaseURI(string calldata _base_uri) public onlyOwner {
+        require(bytes(_base_uri).length > 0, "The base URI can not be empty");
+        _set_base_uri(_base_uri);
     }
 
     function isInWhiteList(address _addr) public view returns (bool) {
-        return whitelist[_addr];
+        return whitelist_entries[_addr].listed;
+    }
+
+    function whitelist(address _addr) public view returns (bool) {
+        return whitelist_entries[_addr].listed;
+    }
+
+    function whitelist_used(address _addr) public view returns (bool) {
+        return whitelist_entries[_addr].used;
+    }
+
+    function isInMerkleWhiteList(address _addr, bytes32[] calldata _proof)
+        public
+        view
+        returns (bool)
+    {
+        return _isInMerkleWhiteList(_addr, _proof);
+    }
+
+    function _isInMerkleWhiteList(address _addr, bytes32[] memory _proof)
+        internal
+        view
+        returns (bool)
+    {
+        bytes32 root = whitelist_merkle_root;
+        if (root == 0) {
+            return false;
+        }
+        return
+            MerkleProof.verify(_proof, root, keccak256(abi.encodePacked(_addr)));
+    }
+
+    function isInFreeMintSnapshot(address _addr, bytes32[] calldata _proof)
+        public
+        view
+        returns (bool)
+    {
+        bytes32 root = free_mint_merkle_root;
+        if (root == 0) {
+            return false;
+        }
+        return
+            MerkleProof.verify(_proof, root, keccak256(abi.encodePacked(_addr)));
+    }
+
+    // The snapshot when there is one, otherwise the free mint contracts
+    function _hasBothFreeMints(address _addr, bytes32[] memory _proof)
+        internal
+        view
+        returns (bool)
+    {
+        bytes32 root = free_mint_merkle_root;
+        if (root != 0) {
+            return
+                MerkleProof.verify(
+                    _proof,
+                    root,
+                    keccak256(abi.encodePacked(_addr))
+                );
+        }
+        return ownsBothFreeMints(_addr);
     }
 
     function ownsBothFreeMints(address _addr) public view returns (bool) {
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import yaml
+import base58
+from concurrent.futures import ProcessPoolExecutor
+
+# $ python scripts/build_metadata.py <season> <spec.json> [output_dir]
+# Writes the JSON for every token of a season (and the pre-reveal JSON) to
+# output_dir/json and output_dir/prereveal, one file per token id with no
+# .json extension, and works out the IPFS folder hash (CIDv0) of each folder
+# without a network. The hashes are saved to output_dir/folders.json, which
+# deploy.py can read with --metadata=output_dir.
+#
+# The spec is a JSON object with the season's description, external_url,
+# background_color, images_folder (the IPFS folder with <token id>.png in it),
+# prereveal_image and optionally "attributes": {"<token id>": [...]}.
+#
+# The hashes are the ones `ipfs add -r --cid-version=0` gives the folders:
+# each file is a single dag-pb/UnixFS block (so it has to be under the
+# 256KiB chunk size) and the folder is a plain, unsharded directory block.
+
+config_path = os.path.join(os.path.dirname(__file__), "..", "brownie-config.yaml")
+chunk_size = 256 * 1024
+# Above this go-ipfs shards the directory (HAMT), which isn't handled here
+max_directory_size = 256 * 1024
+tokens_per_task = 250
+
+unixfs_directory = 1
+unixfs_file = 2
+
+
+def encode_varint(number):
+    encoded = b""
+    while True:
+        byte = number & 0x7F
+        number >>= 7
+        if number:
+            encoded += bytes([byte | 0x80])
+        else:
+            return encoded + bytes([byte])
+
+
+def encode_bytes_field(field, value):
+    return encode_varint(field << 3 | 2) + encode_varint(len(value)) + value
+
+
+def encode_varint_field(field, value):
+    return encode_varint(field << 3) + encode_varint(value)
+
+
+def get_multihash(block):
+    return b"\x12\x20" + hashlib.sha256(block).digest()
+
+
+def get_cid(block):
+    return base58.b58encode(get_multihash(block)).decode()
+
+
+# A dag-pb node puts its links (field 2) before its data (field 1)
+def encode_node(data, links=()):
+    node = b""
+    for name, multihash, size in links:
+        link = encode_bytes_field(1, multihash)
+        link += encode_bytes_field(2, name.encode())
+        link += encode_varint_field(3, size)
+        node += encode_bytes_field(2, link)
+    return node + encode_bytes_field(1, data)
+
+
+def encode_file(content):
+    if len(content) > chunk_size:
+        raise Exception("Files over " + str(chunk_size) + " bytes are not supported")
+    data = encode_varint_field(1, unixfs_file)
+    if content:
+        data += encode_bytes_field(2, content)
+    data += encode_varint_field(3, len(content))
+    return encode_node(data)
+
+
+# links is a list of (name, multihash, cumulative size)
+def encode_directory(links):
+    links = sorted(links, key=lambda link: link[0].encode())
+    if sum(len(name) + len(multihash) for name, multihash, size in links) > (
+        max_directory_size
+    ):
+        raise Exception("The folder is too big to hash without sharding")
+    return encode_node(encode_varint_field(1, unixfs_directory), links)
+
+
+def read_max_supply(season):
+    with open(config_path) as config_file:
+        return yaml.safe_load(config_file)["season"][season]["max_supply"]
+
+
+# The contract's name for a season, also used by deploy.py (which imports
+# from here: this script runs without brownie)
+def get_name(season):
+    return "Poor Apes - " + season.replace("_", " ").title()
+
+
+def get_token_json(season, spec, token_id, prereveal):
+    image = "ipfs://" + spec["images_folder"] + "/" + str(token_id) + ".png"
+    attributes = spec.get("attributes", {}).get(str(token_id), [])
+    if prereveal:
+        image = spec["prereveal_image"]
+        attributes = []
+    return {
+        "name": get_name(season) + " #" + str(token_id),
+        "description": spec["description"],
+        "image": image,
+        "external_url": spec["external_url"],
+        "background_color": spec["background_color"],
+        "attributes": attributes,
+    }
+
+
+# Runs in the process pool. Writes one range of tokens and returns the
+# directory link for each of them.
+def build_tokens(task):
+    season, spec, folder, prereveal, token_ids = task
+    links = []
+    for token_id in token_ids:
+        document = get_token_json(season, spec, token_id, prereveal)
+        content = json.dumps(document, sort_keys=True, separators=(",", ":")).encode()
+        with open(os.path.join(folder, str(token_id)), "wb") as token_file:
+            token_file.write(content)
+        block = encode_file(content)
+        links.append((str(token_id), get_multihash(block), len(block)))
+    return links
+
+
+def build_folder(executor, season, spec, folder, max_supply, prereveal):
+    # Old files would end up in the upload but not in the hash
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+    tasks = [
+        (
+            season,
+            spec,
+            folder,
+            prereveal,
+            range(start, min(start + tokens_per_task, max_supply)),
+        )
+        for start in range(0, max_supply, tokens_per_task)
+    ]
+    links = []
+    for task_links in executor.map(build_tokens, tasks):
+        links += task_links
+    return get_cid(encode_directory(links))
+
+
+def build_season(season, spec, output_dir, max_supply=None, workers=None):
+    if max_supply is None:
+        max_supply = read_max_supply(season)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        folders = {
+            "season": season,
+            "max_supply": max_supply,
+            "json_folder": build_folder(
+                executor,
+                season,
+                spec,
+                os.path.join(output_dir, "json"),
+                max_supply,
+                False,
+            ),
+            "prereveal_json_folder": build_folder(
+                executor,
+                season,
+                spec,
+                os.path.join(output_dir, "prereveal"),
+                max_supply,
+                True,
+            ),
+        }
+    with open(os.path.join(output_dir, "folders.json"), "w") as folders_file:
+        json.dump(folders, folders_file, indent=2)
+    return folders
+
+
+def load_folders(output_dir):
+    with open(os.path.join(output_dir, "folders.json")) as folders_file:
+        return json.load(folders_file)
+
+
+def main(season, spec_path, output_dir=None):
+    if output_dir is None:
+        output_dir = os.path.join("metadata", season)
+    with open(spec_path) as spec_file:
+        spec = json.load(spec_file)
+    folders = build_season(season, spec, output_dir)
+    print("json folder: " + folders["json_folder"])
+    print("prereveal json folder: " + folders["prereveal_json_folder"])
+    return folders
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
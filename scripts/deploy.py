@@ -1,4 +1,6 @@
+import os
 import sys
+import json
 from random import randrange
 from brownie import (
     Wei,
@@ -8,9 +10,17 @@ from brownie import (
     MockV3Aggregator,
     PoorApes,
     FreeMint,
+    web3,
 )
+from brownie.convert import to_address
+from eth_utils import keccak
+
+from scripts.build_metadata import load_folders, get_name
 
 seasons = ["chicago", "new_york", "detroit"]
+# The price the mock price feed starts at when main() deploys (or dry-runs) on
+# development, under the 20k usd the contract allows minting below
+development_BTC_USD_price = 19000
 
 
 def deploy_poor_apes_contract(
@@ -18,43 +28,419 @@ def deploy_poor_apes_contract(
     season=None,
     accessories_contract=None,
     accommodation_contract=None,
+    concurrent=False,
+    json_folder=None,
+    prereveal_json_folder=None,
+    checkpoint_path=None,
+):
+    plan = get_deployment_plan(
+        BTC_USD_price,
+        season,
+        accessories_contract,
+        accommodation_contract,
+        json_folder,
+        prereveal_json_folder,
+    )
+    return deploy_from_plan(plan, concurrent, checkpoint_path)
+
+
+# Every constructor argument is resolved (and checked) here once, so nothing
+# is sent to the network until we know the whole deployment will go through.
+def get_deployment_plan(
+    BTC_USD_price=None,
+    season=None,
+    accessories_contract=None,
+    accommodation_contract=None,
+    json_folder=None,
+    prereveal_json_folder=None,
 ):
-    if type(BTC_USD_price) != int:
-        raise Exception("BTC_USD_price needs to be of type int")
-
     if season == None:
         season = "chicago"
     if season not in seasons:
         raise Exception("Season needs to be " + ", ".join(seasons))
 
+    development = network.show_active() == "development"
+    if (development or BTC_USD_price is not None) and type(BTC_USD_price) != int:
+        raise Exception("BTC_USD_price needs to be of type int")
+
     account = get_owner_account()
-    accessories_contract_obj = accessories_contract
-    accommodation_contract_obj = accommodation_contract
-    if accessories_contract is None:
-        accessories_contract_obj = get_accessories_smart_contract_address(account)
-    if accommodation_contract is None:
-        accommodation_contract_obj = get_accommodation_smart_contract_address(account)
-
-    if network.show_active() == "development" and BTC_USD_price == None:
-        raise Exception("You need to pass a BTC_USD price")
+    # On development the dependencies that are None get deployed
+    if accessories_contract is None and not development:
+        accessories_contract = get_accessories_smart_contract_address(account)
+    if accommodation_contract is None and not development:
+        accommodation_contract = get_accommodation_smart_contract_address(account)
+    price_feed_address = None
+    if not development:
+        price_feed_address = get_price_feed_address(account)
+    # The folders from scripts/build_metadata.py, or the ones in the config
+    if json_folder is None:
+        json_folder = get_json_folder()
+    if prereveal_json_folder is None:
+        prereveal_json_folder = get_prereveal_json_folder()
+
+    plan = {
+        "network": network.show_active(),
+        "season": season,
+        "owner": account,
+        "BTC_USD_price": BTC_USD_price,
+        "price_feed": price_feed_address,
+        "accessories": accessories_contract,
+        "accommodation": accommodation_contract,
+        "name": get_name(season),
+        "ticker": get_ticker(season),
+        "marketing": get_marketing_address(),
+        "json_folder": json_folder,
+        "prereveal_json_folder": prereveal_json_folder,
+        "max_supply": get_max_supply(season),
+        "price_normal": price_normal_as_wei(season),
+        "price_wl": price_wl_as_wei(season),
+    }
+    validate_deployment_plan(plan)
+    return plan
+
+
+def validate_deployment_plan(plan):
+    # The same checks the PoorApes constructor does
+    if len(plan["json_folder"]) != 46:
+        raise Exception("IPFS folder incorrect length")
+    if len(plan["prereveal_json_folder"]) != 46:
+        raise Exception("IPFS pre-reveal folder incorrect length")
+    for key in ["price_feed", "accessories", "accommodation", "marketing"]:
+        if plan[key] is not None:
+            try:
+                to_address(str(plan[key]))
+            except ValueError:
+                raise Exception(
+                    "The " + key + " address is not valid (" + str(plan[key]) + ")"
+                )
+    if type(plan["max_supply"]) != int or plan["max_supply"] < 2:
+        raise Exception("max_supply needs to be an int of at least 2")
+    if plan["price_wl"] > plan["price_normal"]:
+        raise Exception("The whitelist price can not be more than the normal price")
+
+
+# The contracts the PoorApes contract depends on that need deploying first
+def get_planned_dependencies(plan):
+    planned = []
+    if plan["price_feed"] is None:
+        planned.append(
+            (
+                "price_feed",
+                MockV3Aggregator,
+                [8, adjust_BTC_USD_price(plan["BTC_USD_price"])],
+            )
+        )
+    if plan["accessories"] is None:
+        planned.append(("accessories", FreeMint, []))
+    if plan["accommodation"] is None:
+        planned.append(("accommodation", FreeMint, []))
+    return planned
+
+
+def get_poor_apes_constructor_args(plan, dependencies):
+    return [
+        plan["name"],
+        plan["ticker"],
+        dependencies["price_feed"],
+        plan["marketing"],
+        dependencies["accessories"],
+        dependencies["accommodation"],
+        plan["json_folder"],
+        plan["prereveal_json_folder"],
+        plan["max_supply"],
+        plan["price_normal"],
+        plan["price_wl"],
+    ]
+
+
+def estimate_deployment_gas(plan):
+    owner = plan["owner"]
+    # The constructor only stores the dependency addresses, so any address
+    # will do for the ones that haven't been deployed yet
+    dependencies = {}
+    for key in ["price_feed", "accessories", "accommodation"]:
+        dependencies[key] = plan[key] if plan[key] is not None else owner.address
+    planned = get_planned_dependencies(plan) + [
+        ("poor_apes", PoorApes, get_poor_apes_constructor_args(plan, dependencies))
+    ]
+    estimates = {}
+    for name, contract_type, args in planned:
+        estimates[name] = contract_type.deploy.estimate_gas(*args, {"from": owner})
+    return estimates
+
+
+def print_deployment_plan(plan, estimates):
+    for key, value in plan.items():
+        print(key + ": " + str(value))
+    gas_price = web3.eth.gas_price
+    total_gas = 0
+    for name, gas in estimates.items():
+        print("gas (" + name + "): " + str(gas))
+        total_gas += gas
+    print("total gas: " + str(total_gas))
+    print("gas price: " + str(Wei(gas_price).to("gwei")) + " gwei")
+    print("total cost: " + str(Wei(total_gas * gas_price).to("ether")) + " ether")
+
+
+# With a checkpoint_path, every contract is recorded there once it is
+# deployed, and a re-run (after a failure part of the way through) skips
+# the ones already on chain with the same constructor arguments
+def deploy_from_plan(plan, concurrent=False, checkpoint_path=None):
+    checkpoint = load_checkpoint(checkpoint_path, plan)
+    if concurrent:
+        dependencies = deploy_dependencies_concurrently(plan, checkpoint)
     else:
-        price_feed_address = get_price_feed_address(account, int(BTC_USD_price))
-        poor_apes_contract = PoorApes.deploy(
-            get_name(season),
-            get_ticker(season),
-            price_feed_address,
-            get_marketing_account(),
-            accessories_contract_obj,
-            accommodation_contract_obj,
-            get_json_folder(),
-            get_prereveal_json_folder(),
-            get_max_supply(season),
-            price_normal_as_wei(season),
-            price_wl_as_wei(season),
-            {"from": account},
+        dependencies = deploy_dependencies(plan, checkpoint)
+    args = get_poor_apes_constructor_args(plan, dependencies)
+    args_hash = get_args_hash(PoorApes, args, plan["owner"])
+    address = get_checkpointed_address(checkpoint, "poor_apes", args_hash)
+    if address is not None:
+        return PoorApes.at(address)
+    poor_apes_contract = PoorApes.deploy(*args, {"from": plan["owner"]})
+    record_step(checkpoint, "poor_apes", poor_apes_contract.tx, args_hash)
+    print(poor_apes_contract.address)
+    return poor_apes_contract
+
+
+def get_dependencies(plan, checkpoint):
+    dependencies = {
+        "price_feed": plan["price_feed"],
+        "accessories": plan["accessories"],
+        "accommodation": plan["accommodation"],
+    }
+    planned = []
+    for name, contract_type, args in get_planned_dependencies(plan):
+        args_hash = get_args_hash(contract_type, args, plan["owner"])
+        address = get_checkpointed_address(checkpoint, name, args_hash)
+        if address is None:
+            planned.append((name, contract_type, args))
+        else:
+            dependencies[name] = address
+    return dependencies, planned
+
+
+def deploy_dependencies(plan, checkpoint=None):
+    dependencies, planned = get_dependencies(plan, checkpoint)
+    for name, contract_type, args in planned:
+        tx = contract_type.deploy(*args, {"from": plan["owner"]}).tx
+        record_step(
+            checkpoint, name, tx, get_args_hash(contract_type, args, plan["owner"])
+        )
+        dependencies[name] = tx.contract_address
+    return dependencies
+
+
+# The accessories & accommodation contracts and the price feed don't depend
+# on each other, so their deployments are sent together (with consecutive
+# nonces) and only then do we wait for the receipts.
+def deploy_dependencies_concurrently(plan, checkpoint=None):
+    dependencies, planned = get_dependencies(plan, checkpoint)
+    args_hashes = dict(
+        (name, get_args_hash(contract_type, args, plan["owner"]))
+        for name, contract_type, args in planned
+    )
+    receipts = send_deployments(
+        plan["owner"],
+        planned,
+        lambda name, tx: record_step(checkpoint, name, tx, args_hashes[name]),
+    )
+    for name, tx in receipts.items():
+        dependencies[name] = tx.contract_address
+    return dependencies
+
+
+# Sends every (name, contract type, args) deployment without waiting, then
+# waits for all of them. Returns the receipts by name. on_deployed(name, tx)
+# is called for each one that succeeded, even if another one failed.
+def send_deployments(account, planned, on_deployed=None):
+    nonce = account.nonce
+    pending = {}
+    for name, contract_type, args in planned:
+        pending[name] = contract_type.deploy(
+            *args, {"from": account, "nonce": nonce, "required_confs": 0}
         )
-        print(poor_apes_contract.address)
-        return poor_apes_contract
+        nonce += 1
+    failed = []
+    for name, tx in pending.items():
+        tx.wait(1)
+        if tx.status != 1:
+            failed.append(name)
+        elif on_deployed is not None:
+            on_deployed(name, tx)
+    if failed:
+        raise Exception("Deploying the " + ", ".join(failed) + " contract failed")
+    return pending
+
+
+def get_code_hash(address):
+    return "0x" + keccak(web3.eth.get_code(address)).hex()
+
+
+# What a step was deployed with: the contract, its constructor arguments
+# (dependency addresses, folders, prices...) and the account that sent it
+def get_args_hash(contract_type, args, owner):
+    deployment = [contract_type._name, [str(arg) for arg in args], str(owner)]
+    return "0x" + keccak(text=json.dumps(deployment)).hex()
+
+
+# Only steps for the same network and season are picked up
+def load_checkpoint(checkpoint_path, plan):
+    checkpoint = {
+        "path": checkpoint_path,
+        "network": plan["network"],
+        "season": plan["season"],
+        "steps": {},
+    }
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as checkpoint_file:
+            saved = json.load(checkpoint_file)
+        if (saved["network"], saved["season"]) == (plan["network"], plan["season"]):
+            checkpoint["steps"] = saved["steps"]
+    return checkpoint
+
+
+def save_checkpoint(checkpoint):
+    if checkpoint["path"] is None:
+        return
+    saved = dict((key, checkpoint[key]) for key in ["network", "season", "steps"])
+    # Written to a temporary file first so a crash can't leave half a file
+    with open(checkpoint["path"] + ".tmp", "w") as checkpoint_file:
+        json.dump(saved, checkpoint_file, indent=2)
+    os.replace(checkpoint["path"] + ".tmp", checkpoint["path"])
+
+
+def record_step(checkpoint, name, tx, args_hash):
+    if checkpoint is None:
+        return
+    checkpoint["steps"][name] = {
+        "address": tx.contract_address,
+        "tx": tx.txid,
+        "code_hash": get_code_hash(tx.contract_address),
+        "args_hash": args_hash,
+    }
+    save_checkpoint(checkpoint)
+
+
+# The recorded address, if it was deployed with the same arguments and the
+# code deployed there is still on chain
+def get_checkpointed_address(checkpoint, name, args_hash):
+    if checkpoint is None or name not in checkpoint["steps"]:
+        return None
+    step = checkpoint["steps"][name]
+    if step.get("args_hash") != args_hash:
+        print("The " + name + " contract was recorded with other arguments")
+        return None
+    if get_code_hash(step["address"]) != step["code_hash"]:
+        print("The " + name + " contract is not at " + step["address"] + " any more")
+        return None
+    print("Skipping " + name + ", already deployed at " + step["address"])
+    return step["address"]
+
+
+def get_manifest_entry(address, tx=None):
+    if tx is None:
+        return {"address": str(address), "tx": None, "gas_used": None}
+    return {"address": tx.contract_address, "tx": tx.txid, "gas_used": tx.gas_used}
+
+
+# The same as send_deployments, waiting for each deployment before the next
+def send_deployments_one_by_one(account, planned):
+    receipts = {}
+    for name, contract_type, args in planned:
+        receipts[name] = contract_type.deploy(*args, {"from": account}).tx
+    return receipts
+
+
+def get_all_seasons_plans(BTC_USD_price=None, folders=None):
+    if folders is None:
+        folders = {}
+    plans = []
+    for season in seasons:
+        json_folder, prereveal_json_folder = folders.get(season, (None, None))
+        plans.append(
+            get_deployment_plan(
+                BTC_USD_price,
+                season,
+                json_folder=json_folder,
+                prereveal_json_folder=prereveal_json_folder,
+            )
+        )
+    return plans
+
+
+# Deploys every season in one go. The seasons share one price feed and one
+# pair of FreeMint contracts, and (if concurrent) the PoorApes contracts are
+# sent together. folders is {season: (json_folder, prereveal_json_folder)}
+# for the seasons that don't use the config's folders. The manifest (season
+# -> addresses, tx hashes and gas) is written to manifest_path and returned.
+def deploy_all_seasons(
+    BTC_USD_price=None, manifest_path=None, concurrent=True, folders=None
+):
+    plans = get_all_seasons_plans(BTC_USD_price, folders)
+    owner = plans[0]["owner"]
+    send = send_deployments if concurrent else send_deployments_one_by_one
+    manifest = {"network": plans[0]["network"], "dependencies": {}, "seasons": {}}
+    receipts = send(owner, get_planned_dependencies(plans[0]))
+    for name in ["price_feed", "accessories", "accommodation"]:
+        manifest["dependencies"][name] = get_manifest_entry(
+            plans[0][name], receipts.get(name)
+        )
+    dependencies = dict(
+        (name, entry["address"]) for name, entry in manifest["dependencies"].items()
+    )
+    receipts = send(
+        owner,
+        [
+            (
+                plan["season"],
+                PoorApes,
+                get_poor_apes_constructor_args(plan, dependencies),
+            )
+            for plan in plans
+        ],
+    )
+    for season, tx in receipts.items():
+        manifest["seasons"][season] = get_manifest_entry(None, tx)
+    if manifest_path is None:
+        manifest_path = get_manifest_path()
+    save_manifest(manifest_path, manifest)
+    return manifest
+
+
+# Re-running a deployment that failed on a live network picks up from here
+def get_checkpoint_path(season):
+    if network.show_active() == "development":
+        return None
+    os.makedirs("deployments", exist_ok=True)
+    return os.path.join(
+        "deployments", network.show_active() + "-" + season + ".checkpoint.json"
+    )
+
+
+def get_manifest_path():
+    return os.path.join("deployments", network.show_active() + ".json")
+
+
+def save_manifest(manifest_path, manifest):
+    if os.path.dirname(manifest_path):
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+
+def load_manifest(manifest_path=None):
+    if manifest_path is None:
+        manifest_path = get_manifest_path()
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+
+# The deployed PoorApes contracts in a manifest, by season
+def get_manifest_contracts(manifest):
+    return dict(
+        (season, PoorApes.at(entry["address"]))
+        for season, entry in manifest["seasons"].items()
+    )
 
 
 def get_owner_account():
@@ -73,6 +459,13 @@ def get_marketing_account():
         )
 
 
+def get_marketing_address():
+    if network.show_active() == "development":
+        return accounts[1].address
+    else:
+        return config["networks"][network.show_active()]["marketing_address"]
+
+
 def get_accessories_smart_contract_address(account):
     if network.show_active() == "development":
         return FreeMint.deploy({"from": account}).address
@@ -87,10 +480,6 @@ def get_accommodation_smart_contract_address(account):
         return config["networks"][network.show_active()]["accommodation_address"]
 
 
-def get_name(active_season):
-    return "Poor Apes - " + active_season.replace("_", " ").title()
-
-
 def get_ticker(active_season):
     return config["season"][active_season]["ticker"]
 
@@ -136,12 +525,66 @@ def price_wl_as_wei(season):
     return Wei(str(config["season"][season]["price"]["wl"]) + " ether")
 
 
+def get_main_BTC_USD_price():
+    if network.show_active() == "development":
+        return development_BTC_USD_price
+    return None
+
+
+# The folders scripts/build_metadata.py built for the season, as
+# (json_folder, prereveal_json_folder)
+def get_metadata_folders(metadata_dir, season):
+    folders = load_folders(metadata_dir)
+    if folders["season"] != season:
+        raise Exception("The metadata was built for " + folders["season"])
+    if folders["max_supply"] != get_max_supply(season):
+        raise Exception("The metadata was built for a different max_supply")
+    return folders["json_folder"], folders["prereveal_json_folder"]
+
+
 def main():
     season = "chicago"
     # (for when calling from the command line)
-    if len(sys.argv) == 2:
-        if sys.argv[1] not in ["chicago", "new_york", "detroit"]:
-            raise Exception("Season needs to be chicago, new_york or detroit")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    concurrent = "--concurrent" in sys.argv
+    dry_run = "--dry-run" in sys.argv
+    # --metadata=<output_dir of scripts/build_metadata.py>, or for all the
+    # seasons the directory holding one output_dir per season
+    metadata_dir = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--metadata="):
+            metadata_dir = arg[len("--metadata=") :]
+    BTC_USD_price = get_main_BTC_USD_price()
+    if args == ["all"]:
+        folders = {}
+        if metadata_dir is not None:
+            for season in seasons:
+                folders[season] = get_metadata_folders(
+                    os.path.join(metadata_dir, season), season
+                )
+        if dry_run:
+            for plan in get_all_seasons_plans(BTC_USD_price, folders):
+                print_deployment_plan(plan, estimate_deployment_gas(plan))
+            return
+        return deploy_all_seasons(BTC_USD_price, concurrent=concurrent, folders=folders)
+    if len(args) == 1:
+        if args[0] not in seasons:
+            raise Exception("Season needs to be " + ", ".join(seasons) + " or all")
         else:
-            season = sys.argv[1]
-    return deploy_poor_apes_contract(None, season)
+            season = args[0]
+    json_folder = None
+    prereveal_json_folder = None
+    if metadata_dir is not None:
+        json_folder, prereveal_json_folder = get_metadata_folders(metadata_dir, season)
+    plan = get_deployment_plan(
+        BTC_USD_price,
+        season,
+        json_folder=json_folder,
+        prereveal_json_folder=prereveal_json_folder,
+    )
+    if dry_run:
+        # Print what would be deployed and what it would cost, without
+        # sending any transactions
+        print_deployment_plan(plan, estimate_deployment_gas(plan))
+        return plan
+    return deploy_from_plan(plan, concurrent, get_checkpoint_path(season))
@@ -0,0 +1,105 @@
+import csv
+from brownie import PoorApes, Multicall2, network, config
+
+from scripts.deploy import get_owner_account
+
+# $ brownie run scripts/eligibility.py main whitelist.csv eligibility.csv
+# Reads what the mint site shows for an address (whitelisted, owns both free
+# mints, discount used, NFTs held and the mint price) for many addresses at
+# once. Every query for a batch of addresses goes into one eth_call through a
+# Multicall2 contract, so 5,000 addresses take a few calls instead of 25,000.
+
+# Five calls per address, kept well under a node's gas cap for an eth_call
+default_batch_size = 400
+
+
+def get_multicall():
+    multicall_address = config["networks"][network.show_active()].get("multicall2")
+    if multicall_address:
+        return Multicall2.at(multicall_address)
+    if network.show_active() != "development":
+        raise Exception("Set multicall2 for " + network.show_active())
+    if len(Multicall2) == 0:
+        Multicall2.deploy({"from": get_owner_account()})
+    return Multicall2[-1]
+
+
+def get_queries(contract, address, num_nfts):
+    return [
+        ("whitelisted", contract.isInWhiteList, [address]),
+        ("both_free_mints", contract.ownsBothFreeMints, [address]),
+        ("whitelist_used", contract.whitelist_used, [address]),
+        ("balance", contract.balanceOf, [address]),
+        ("mint_cost", contract.mint_cost_for, [address, num_nfts]),
+    ]
+
+
+# Returns {address: row}. A query that reverts (e.g. asking the price of more
+# NFTs than the address' tier allows) is None in the row.
+def get_eligibility(
+    contract, addresses, num_nfts=1, multicall=None, batch_size=default_batch_size
+):
+    if multicall is None:
+        multicall = get_multicall()
+    table = {}
+    for start in range(0, len(addresses), batch_size):
+        batch = addresses[start : start + batch_size]
+        queries = []
+        for address in batch:
+            for key, method, args in get_queries(contract, address, num_nfts):
+                queries.append((address, key, method, args))
+        results = multicall.tryAggregate.call(
+            False,
+            [
+                (contract.address, method.encode_input(*args))
+                for _, _, method, args in queries
+            ],
+        )
+        for (address, key, method, args), (success, return_data) in zip(
+            queries, results
+        ):
+            row = table.setdefault(address, {})
+            row[key] = None
+            if success:
+                row[key] = method.decode_output(return_data.hex())
+    return table
+
+
+def read_addresses(csv_path):
+    with open(csv_path, newline="") as csv_file:
+        for row in csv.reader(csv_file):
+            if row and row[0].strip().startswith("0x"):
+                yield row[0].strip()
+
+
+def write_eligibility(table, output_path):
+    with open(output_path, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(
+            [
+                "address",
+                "whitelisted",
+                "both_free_mints",
+                "whitelist_used",
+                "balance",
+                "mint_cost",
+            ]
+        )
+        for address, row in table.items():
+            writer.writerow(
+                [
+                    address,
+                    row["whitelisted"],
+                    row["both_free_mints"],
+                    row["whitelist_used"],
+                    row["balance"],
+                    row["mint_cost"],
+                ]
+            )
+
+
+def main(csv_path, output_path="eligibility.csv", num_nfts="1"):
+    table = get_eligibility(PoorApes[-1], list(read_addresses(csv_path)), int(num_nfts))
+    write_eligibility(table, output_path)
+    print(str(len(table)) + " addresses written to " + output_path)
+    return table
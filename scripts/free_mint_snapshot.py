@@ -0,0 +1,72 @@
+from brownie import PoorApes, web3
+
+from scripts.deploy import get_owner_account
+from scripts.holder_index import open_index, update_index, get_holders
+from scripts.merkle_whitelist import build_tree_from_file, export_proofs, get_root
+
+# $ brownie run scripts/free_mint_snapshot.py main <block> <from_block> --network goerli
+# Finds who holds both free mints (accessories and accommodation) at a block
+# from the FreeMint contracts' Transfer events, writes them to
+# free_mint_snapshot.csv and their proofs for the mint site to
+# free_mint_proofs.json, then commits the merkle root to PoorApes with
+# setFreeMintMerkleRoot(). From then on the free mint price is decided by the
+# snapshot: minting doesn't call the free mint contracts, and moving free
+# mints around during the mint changes nothing.
+#
+# from_block should be the block the FreeMint contracts were deployed in, so
+# the blocks before it aren't searched for events.
+
+default_addresses_path = "free_mint_snapshot.csv"
+default_proofs_path = "free_mint_proofs.json"
+
+
+# {holder: balance} at the end of `block`
+def get_holders_at(contract_address, block, from_block=0):
+    connection = open_index(":memory:")
+    update_index(connection, contract_address, from_block, block)
+    return get_holders(connection, contract_address)
+
+
+def get_both_free_mint_holders(contract, block, from_block=0):
+    accessories_holders = get_holders_at(
+        contract.accessories_address(), block, from_block
+    )
+    accommodation_holders = get_holders_at(
+        contract.accommodation_address(), block, from_block
+    )
+    return sorted(set(accessories_holders) & set(accommodation_holders))
+
+
+def write_addresses(addresses, addresses_path):
+    with open(addresses_path, "w") as addresses_file:
+        addresses_file.write("address\n")
+        for address in addresses:
+            addresses_file.write(address + "\n")
+
+
+# Returns the merkle levels of the snapshot
+def take_snapshot(
+    contract,
+    block,
+    from_block=0,
+    addresses_path=default_addresses_path,
+    proofs_path=default_proofs_path,
+):
+    addresses = get_both_free_mint_holders(contract, block, from_block)
+    if not addresses:
+        raise Exception("Nobody holds both free mints at block " + str(block))
+    write_addresses(addresses, addresses_path)
+    levels = build_tree_from_file(addresses_path)
+    export_proofs(levels, addresses_path, proofs_path)
+    return levels
+
+
+def main(block=None, from_block="0"):
+    if block is None:
+        block = web3.eth.block_number
+    contract = PoorApes[-1]
+    levels = take_snapshot(contract, int(block), int(from_block))
+    root = get_root(levels)
+    print("free mint merkle root at block " + str(block) + ": " + root)
+    contract.setFreeMintMerkleRoot(root, {"from": get_owner_account()})
+    return root
@@ -0,0 +1,74 @@
+from brownie import Wei, accounts, web3
+from brownie.network.account import LocalAccount
+from eth_account.hdaccount import seed_from_mnemonic, key_from_seed
+
+# As many accounts as a test needs without starting ganache with all of them.
+# minters[i] is always the same account (derived from the mnemonic at
+# m/44'/60'/0'/0/i) and it is sent ETH from one of the faucet accounts the
+# first time it is used. The balance is checked every time, so an account
+# whose funding was undone by chain.revert() gets funded again.
+#
+# The accounts aren't added to brownie's `accounts`, so len(accounts) and
+# accounts[-1] still only cover the accounts ganache started with.
+
+# Only used for these accounts. Not the mnemonic a dev node (ganache, Hardhat,
+# Anvil) derives its own accounts from, or minters[0] and minters[1] would be
+# the owner and marketing accounts.
+default_mnemonic = (
+    "jeans vapor gold federal casino october isolate trim hard omit renew wire"
+)
+default_funding = Wei("1 ether")
+
+
+class FundedAccounts:
+    def __init__(
+        self, mnemonic=default_mnemonic, funding=default_funding, faucets=None
+    ):
+        self.seed = seed_from_mnemonic(mnemonic, "")
+        self.funding = funding
+        self.faucets = faucets
+        self.derived = {}
+        self.next_faucet = 0
+
+    def get_faucets(self):
+        # Ganache's own accounts, if none were given
+        if self.faucets is None:
+            return list(accounts)
+        return self.faucets
+
+    def derive(self, index):
+        if index not in self.derived:
+            key = key_from_seed(self.seed, "m/44'/60'/0'/0/" + str(index))
+            w3account = web3.eth.account.from_key(key)
+            self.derived[index] = LocalAccount(w3account.address, w3account, key)
+        return self.derived[index]
+
+    def send_funding(self, account, required_confs=1):
+        faucets = self.get_faucets()
+        faucet = faucets[self.next_faucet % len(faucets)]
+        self.next_faucet += 1
+        return faucet.transfer(
+            account, self.funding, required_confs=required_confs, silent=True
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.get_range(index.start or 0, index.stop)
+        account = self.derive(index)
+        if account.balance() == 0:
+            self.send_funding(account)
+        return account
+
+    # Funds a range of accounts without waiting on each transfer in turn
+    def get_range(self, start, stop):
+        needed = [self.derive(index) for index in range(start, stop)]
+        pending = [
+            self.send_funding(account, required_confs=0)
+            for account in needed
+            if account.balance() == 0
+        ]
+        for tx in pending:
+            tx.wait(1)
+            if tx.status != 1:
+                raise Exception("Funding " + tx.receiver + " failed")
+        return needed
@@ -0,0 +1,257 @@
+import sqlite3
+from brownie import PoorApes, web3
+from eth_utils import keccak, to_checksum_address
+
+# $ brownie run scripts/holder_index.py main holders.db
+# Keeps a local SQLite index of who holds which PoorApes token, built from the
+# contract's Transfer events. The last indexed block is stored with the index,
+# so running it again only has to look at the blocks since then, and the last
+# `confirmations` blocks before it in case they were reorganised. Every
+# Transfer is stored by (tx hash, log index), so one that was indexed already
+# is never counted twice, and the ones that a reorg dropped are undone.
+#
+# ERC721A emits one Transfer per token, so a batched mint is simply several
+# Transfer logs in the same transaction.
+
+transfer_topic = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+zero_address = "0x0000000000000000000000000000000000000000"
+default_page_size = 2000
+default_confirmations = 12
+
+schema = """
+CREATE TABLE IF NOT EXISTS tokens (
+    contract TEXT NOT NULL,
+    token_id INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (contract, token_id)
+);
+CREATE INDEX IF NOT EXISTS tokens_by_owner ON tokens (contract, owner);
+CREATE TABLE IF NOT EXISTS holders (
+    contract TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    balance INTEGER NOT NULL,
+    PRIMARY KEY (contract, owner)
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    contract TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    token_id INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    PRIMARY KEY (contract, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS transfers_by_block
+    ON transfers (contract, block, log_index);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    contract TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+"""
+
+
+def open_index(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.executescript(schema)
+    return connection
+
+
+def get_checkpoint(connection, contract_address):
+    row = connection.execute(
+        "SELECT block FROM checkpoints WHERE contract = ?", (contract_address,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def topic_to_address(topic):
+    return to_checksum_address(bytes(topic)[-20:])
+
+
+def get_transfer(log):
+    return (
+        log["transactionHash"].hex(),
+        log["logIndex"],
+        log["blockNumber"],
+        int.from_bytes(bytes(log["topics"][3]), "big"),
+        topic_to_address(log["topics"][1]),
+        topic_to_address(log["topics"][2]),
+    )
+
+
+def move_token(connection, contract_address, token_id, sender, receiver):
+    if sender != zero_address:
+        connection.execute(
+            "UPDATE holders SET balance = balance - 1 WHERE contract = ? AND owner = ?",
+            (contract_address, sender),
+        )
+        connection.execute(
+            "DELETE FROM holders WHERE contract = ? AND owner = ? AND balance = 0",
+            (contract_address, sender),
+        )
+    if receiver == zero_address:
+        connection.execute(
+            "DELETE FROM tokens WHERE contract = ? AND token_id = ?",
+            (contract_address, token_id),
+        )
+        return
+    connection.execute(
+        "INSERT OR REPLACE INTO tokens (contract, token_id, owner) VALUES (?, ?, ?)",
+        (contract_address, token_id, receiver),
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO holders (contract, owner, balance) VALUES (?, ?, 0)",
+        (contract_address, receiver),
+    )
+    connection.execute(
+        "UPDATE holders SET balance = balance + 1 WHERE contract = ? AND owner = ?",
+        (contract_address, receiver),
+    )
+
+
+# Returns False (and changes nothing) if the transfer was indexed already
+def apply_transfer(connection, contract_address, transfer):
+    inserted = connection.execute(
+        "INSERT OR IGNORE INTO transfers"
+        " (contract, tx_hash, log_index, block, token_id, sender, receiver)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (contract_address,) + transfer,
+    )
+    if inserted.rowcount == 0:
+        return False
+    tx_hash, log_index, block, token_id, sender, receiver = transfer
+    move_token(connection, contract_address, token_id, sender, receiver)
+    return True
+
+
+# Undoes the indexed transfers from `block` on, latest first, so the index is
+# back to how it was at the end of the block before. Returns the (tx hash, log
+# index) of the transfers undone.
+def undo_transfers(connection, contract_address, block):
+    rows = connection.execute(
+        "SELECT tx_hash, log_index, token_id, sender, receiver FROM transfers"
+        " WHERE contract = ? AND block >= ? ORDER BY block DESC, log_index DESC",
+        (contract_address, block),
+    ).fetchall()
+    for tx_hash, log_index, token_id, sender, receiver in rows:
+        move_token(connection, contract_address, token_id, receiver, sender)
+    connection.execute(
+        "DELETE FROM transfers WHERE contract = ? AND block >= ?",
+        (contract_address, block),
+    )
+    return [(tx_hash, log_index) for tx_hash, log_index, _, _, _ in rows]
+
+
+def get_indexed_transfers(connection, contract_address, from_block, to_block):
+    rows = connection.execute(
+        "SELECT tx_hash, log_index FROM transfers"
+        " WHERE contract = ? AND block >= ? AND block <= ?"
+        " ORDER BY block, log_index",
+        (contract_address, from_block, to_block),
+    )
+    return [tuple(row) for row in rows]
+
+
+def get_transfer_logs(contract_address, from_block, to_block):
+    return web3.eth.get_logs(
+        {
+            "address": contract_address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [transfer_topic],
+        }
+    )
+
+
+# Indexes the blocks from `confirmations` blocks before the checkpoint (or
+# from from_block on the first run) up to to_block, one page of blocks per
+# SQLite transaction. Returns the number of Transfer events that weren't in
+# the index yet.
+def update_index(
+    connection,
+    contract_address,
+    from_block=0,
+    to_block=None,
+    page_size=default_page_size,
+    confirmations=default_confirmations,
+):
+    contract_address = to_checksum_address(str(contract_address))
+    checkpoint = get_checkpoint(connection, contract_address)
+    if checkpoint is not None:
+        from_block = max(from_block, checkpoint + 1 - confirmations)
+    if to_block is None:
+        to_block = web3.eth.block_number
+    processed = 0
+    # Transfers that were indexed before this run
+    seen = set()
+    while from_block <= to_block:
+        page_end = min(from_block + page_size - 1, to_block)
+        try:
+            logs = get_transfer_logs(contract_address, from_block, page_end)
+        except ValueError:
+            # Most providers limit how many logs one request can return
+            if page_size == 1:
+                raise
+            page_size = max(1, page_size // 2)
+            continue
+        logs = sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        transfers = [get_transfer(log) for log in logs]
+        with connection:
+            indexed = get_indexed_transfers(
+                connection, contract_address, from_block, page_end
+            )
+            seen.update(indexed)
+            # Anything but new transfers after the indexed ones means the
+            # blocks were reorganised, so they're indexed again from scratch
+            if [transfer[:2] for transfer in transfers[: len(indexed)]] != indexed:
+                seen.update(undo_transfers(connection, contract_address, from_block))
+            for transfer in transfers:
+                if apply_transfer(connection, contract_address, transfer):
+                    if transfer[:2] not in seen:
+                        processed += 1
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (contract, block) VALUES (?, ?)",
+                (contract_address, page_end),
+            )
+        from_block = page_end + 1
+    return processed
+
+
+def get_owner(connection, contract_address, token_id):
+    row = connection.execute(
+        "SELECT owner FROM tokens WHERE contract = ? AND token_id = ?",
+        (to_checksum_address(str(contract_address)), token_id),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def get_tokens(connection, contract_address, owner):
+    rows = connection.execute(
+        "SELECT token_id FROM tokens WHERE contract = ? AND owner = ? ORDER BY token_id",
+        (to_checksum_address(str(contract_address)), to_checksum_address(str(owner))),
+    )
+    return [row[0] for row in rows]
+
+
+def get_holders(connection, contract_address):
+    rows = connection.execute(
+        "SELECT owner, balance FROM holders WHERE contract = ? ORDER BY owner",
+        (to_checksum_address(str(contract_address)),),
+    )
+    return dict(rows)
+
+
+def main(db_path):
+    connection = open_index(db_path)
+    contract = PoorApes[-1]
+    # Nothing can have happened before the contract was deployed
+    from_block = 0
+    if contract.tx is not None:
+        from_block = contract.tx.block_number
+    processed = update_index(connection, contract.address, from_block)
+    print(
+        str(processed)
+        + " transfers indexed, "
+        + str(len(get_holders(connection, contract.address)))
+        + " holders"
+    )
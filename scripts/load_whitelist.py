@@ -0,0 +1,153 @@
+import os
+import csv
+import json
+import hashlib
+from brownie import PoorApes, web3
+from brownie.convert import to_address
+
+from scripts.deploy import get_owner_account
+
+# $ brownie run scripts/load_whitelist.py main whitelist.csv
+# The first column of every row is an address (a header row is skipped).
+# Progress is kept in whitelist.csv.progress.json so that a run that stopped
+# part of the way through can be started again and picks up where it left off.
+# The progress is only used with the same csv, if the csv changed the
+# progress file has to be deleted to start again from the top.
+
+# A new whitelist entry is a 20k gas SSTORE plus calldata and the loop
+gas_per_address = 25000
+gas_per_transaction = 50000
+# Leave room in each block for everyone else's transactions
+block_gas_fraction = 0.5
+max_in_flight = 16
+
+
+def read_addresses(csv_path, skip=()):
+    with open(csv_path, newline="") as csv_file:
+        for row in csv.reader(csv_file):
+            if not row or not row[0].strip().startswith("0x"):
+                continue
+            address = to_address(row[0].strip())
+            if address in skip:
+                print("Skipping " + address)
+                continue
+            yield address
+
+
+def read_chunks(addresses, chunk_size):
+    chunk = []
+    for address in addresses:
+        chunk.append(address)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def get_chunk_size():
+    gas_limit = web3.eth.get_block("latest").gasLimit
+    usable_gas = gas_limit * block_gas_fraction - gas_per_transaction
+    return max(1, int(usable_gas // gas_per_address))
+
+
+def get_progress_path(csv_path):
+    return csv_path + ".progress.json"
+
+
+def get_csv_hash(csv_path):
+    with open(csv_path, "rb") as csv_file:
+        return hashlib.sha256(csv_file.read()).hexdigest()
+
+
+def load_progress(progress_path, contract, chunk_size, csv_hash):
+    if os.path.exists(progress_path):
+        with open(progress_path) as progress_file:
+            progress = json.load(progress_file)
+        if progress["contract"] == contract.address:
+            # The confirmed chunks are row numbers, they only make sense with
+            # the same rows and the same chunk size
+            if progress.get("csv_hash") != csv_hash:
+                raise Exception(
+                    "The csv changed since "
+                    + progress_path
+                    + " was written, delete it to load the whitelist from the top"
+                )
+            return progress
+    return {
+        "contract": contract.address,
+        "csv_hash": csv_hash,
+        "chunk_size": chunk_size,
+        "confirmed": [],
+    }
+
+
+def save_progress(progress_path, progress):
+    progress["confirmed"] = sorted(set(progress["confirmed"]))
+    with open(progress_path, "w") as progress_file:
+        json.dump(progress, progress_file, indent=2)
+
+
+# Confirmed chunks are recorded in the progress file. A failed chunk is
+# checked against the contract, in case its addresses were added some other way
+def reconcile(contract, progress, start, chunk, tx):
+    tx.wait(1)
+    if tx.status == 1 or all(contract.isInWhiteList(address) for address in chunk):
+        progress["confirmed"].append(start)
+        return True
+    print("Chunk starting at row " + str(start) + " failed (" + tx.txid + ")")
+    return False
+
+
+# Chunks are sent without waiting on each confirmation (up to max_in_flight
+# at a time) and reconciled afterwards. Returns the start rows that failed.
+def load_whitelist(contract, csv_path, owner=None, chunk_size=None, progress_path=None):
+    if owner is None:
+        owner = get_owner_account()
+    if chunk_size is None:
+        chunk_size = get_chunk_size()
+    if progress_path is None:
+        progress_path = get_progress_path(csv_path)
+    progress = load_progress(
+        progress_path, contract, chunk_size, get_csv_hash(csv_path)
+    )
+    chunk_size = progress["chunk_size"]
+    confirmed = set(progress["confirmed"])
+
+    failed = []
+    pending = []
+    nonce = owner.nonce
+    addresses = read_addresses(csv_path, skip={owner.address})
+    for index, chunk in enumerate(read_chunks(addresses, chunk_size)):
+        start = index * chunk_size
+        if start in confirmed:
+            continue
+        tx = contract.addManyToWhiteList(
+            chunk,
+            {
+                "from": owner,
+                "nonce": nonce,
+                "gas_limit": gas_per_transaction + gas_per_address * len(chunk),
+                "required_confs": 0,
+            },
+        )
+        nonce += 1
+        pending.append((start, chunk, tx))
+        if len(pending) == max_in_flight:
+            start, chunk, tx = pending.pop(0)
+            if not reconcile(contract, progress, start, chunk, tx):
+                failed.append(start)
+            save_progress(progress_path, progress)
+    for start, chunk, tx in pending:
+        if not reconcile(contract, progress, start, chunk, tx):
+            failed.append(start)
+    save_progress(progress_path, progress)
+    return failed
+
+
+def main(csv_path):
+    failed = load_whitelist(PoorApes[-1], csv_path)
+    if failed:
+        raise Exception(
+            str(len(failed)) + " chunks failed, run the script again to retry them"
+        )
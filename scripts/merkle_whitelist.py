@@ -0,0 +1,138 @@
+import sys
+import json
+from eth_utils import keccak, to_canonical_address, to_checksum_address
+
+# $ python scripts/merkle_whitelist.py whitelist.csv proofs.json
+# Builds the merkle tree for PoorApes.setWhiteListMerkleRoot() from a file with
+# an address at the start of each line and writes every address' proof to a
+# JSON file for the mint site.
+#
+# The tree matches OpenZeppelin's MerkleProof: a leaf is keccak256(address)
+# and each pair of nodes is sorted before being hashed. Every level is kept as
+# one bytes object of 32 byte nodes. The leaves are sorted, so they double as
+# the index from an address to its position in the tree.
+
+node_size = 32
+
+
+def read_addresses(addresses_path):
+    with open(addresses_path) as addresses_file:
+        for line in addresses_file:
+            address = line.split(",")[0].strip()
+            if address.startswith("0x"):
+                yield address
+
+
+# str() so brownie Accounts can be passed as well as address strings
+def get_leaf(address):
+    return keccak(to_canonical_address(str(address)))
+
+
+def hash_pair(a, b):
+    if a < b:
+        return keccak(a + b)
+    return keccak(b + a)
+
+
+def get_node(level, position):
+    return level[position * node_size : (position + 1) * node_size]
+
+
+def count_nodes(level):
+    return len(level) // node_size
+
+
+def build_tree(addresses):
+    leaves = sorted(set(get_leaf(address) for address in addresses))
+    if not leaves:
+        raise Exception("The whitelist needs at least one address")
+    levels = [b"".join(leaves)]
+    while count_nodes(levels[-1]) > 1:
+        level = levels[-1]
+        nodes = []
+        for position in range(0, count_nodes(level), 2):
+            if position + 1 < count_nodes(level):
+                nodes.append(
+                    hash_pair(get_node(level, position), get_node(level, position + 1))
+                )
+            else:
+                # An odd node out is moved up a level as it is
+                nodes.append(get_node(level, position))
+        levels.append(b"".join(nodes))
+    return levels
+
+
+def build_tree_from_file(addresses_path):
+    return build_tree(read_addresses(addresses_path))
+
+
+def get_root(levels):
+    return "0x" + levels[-1].hex()
+
+
+def find_leaf(levels, address):
+    leaf = get_leaf(address)
+    leaves = levels[0]
+    # Binary search over the sorted leaves
+    low, high = 0, count_nodes(leaves)
+    while low < high:
+        middle = (low + high) // 2
+        if get_node(leaves, middle) < leaf:
+            low = middle + 1
+        else:
+            high = middle
+    if low < count_nodes(leaves) and get_node(leaves, low) == leaf:
+        return low
+    return None
+
+
+def get_proof(levels, address):
+    position = find_leaf(levels, address)
+    if position is None:
+        raise Exception(str(address) + " is not on the whitelist")
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling < count_nodes(level):
+            proof.append("0x" + get_node(level, sibling).hex())
+        position //= 2
+    return proof
+
+
+def verify_proof(root, address, proof):
+    node = get_leaf(address)
+    for sibling in proof:
+        node = hash_pair(node, bytes.fromhex(sibling[2:]))
+    return "0x" + node.hex() == root
+
+
+# Written one address at a time so the whole JSON never has to be in memory
+def export_proofs(levels, addresses_path, proofs_path):
+    with open(proofs_path, "w") as proofs_file:
+        proofs_file.write('{"root": "' + get_root(levels) + '", "proofs": {')
+        written = set()
+        for address in read_addresses(addresses_path):
+            address = to_checksum_address(address)
+            if address in written:
+                continue
+            if written:
+                proofs_file.write(",")
+            proofs_file.write(
+                "\n"
+                + json.dumps(address)
+                + ": "
+                + json.dumps(get_proof(levels, address))
+            )
+            written.add(address)
+        proofs_file.write("\n}}\n")
+
+
+def main(addresses_path, proofs_path):
+    levels = build_tree_from_file(addresses_path)
+    export_proofs(levels, addresses_path, proofs_path)
+    print("merkle root: " + get_root(levels))
+    return get_root(levels)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
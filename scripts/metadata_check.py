@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import aiohttp
+
+# $ python scripts/metadata_check.py <nft_json_folder> <max_supply> [gateway]
+# Fetches the JSON behind every tokenURI of a season (token 0 to max_supply)
+# and checks it has what marketplaces need, before disablePrereveal() points
+# the contract at it. Requests share one connection pool, and at most
+# `concurrency` of them are in flight at a time. Each request gets
+# connect_timeout seconds to connect and read_timeout seconds between reads,
+# so a slow gateway fails a request rather than the requests queued behind it.
+# The documents are cached on disk, so a re-run only fetches what failed last
+# time.
+
+default_gateway = "https://ipfs.io/ipfs/"
+default_concurrency = 32
+default_cache_dir = ".metadata_cache"
+retries = 3
+connect_timeout = 10
+read_timeout = 30
+required_keys = [
+    "name",
+    "description",
+    "image",
+    "external_url",
+    "background_color",
+    "attributes",
+]
+
+
+def get_token_uris(json_folder, max_supply, gateway=default_gateway):
+    # The same URIs the contract's tokenURI() returns (no .json extension)
+    return [
+        gateway + json_folder + "/" + str(token_id) for token_id in range(max_supply)
+    ]
+
+
+def get_image_url(image, gateway=default_gateway):
+    if image.startswith("ipfs://"):
+        return gateway + image[len("ipfs://") :]
+    return image
+
+
+def validate_metadata(document):
+    if not isinstance(document, dict):
+        return ["the metadata is not a JSON object"]
+    errors = []
+    for key in required_keys:
+        if key not in document:
+            errors.append("the " + key + " key is not in the JSON")
+    image = document.get("image")
+    if "image" in document and (
+        not isinstance(image, str)
+        or not image.startswith(("https://", "http://", "ipfs://"))
+    ):
+        errors.append("the image is not a link")
+    attributes = document.get("attributes")
+    if "attributes" in document and (
+        not isinstance(attributes, list)
+        or not all(
+            isinstance(attribute, dict)
+            and "trait_type" in attribute
+            and "value" in attribute
+            for attribute in attributes
+        )
+    ):
+        errors.append("the attributes need to be a list of trait_type/value pairs")
+    return errors
+
+
+# Keyed on the IPFS path so the cache still works after switching gateways
+def get_cache_path(cache_dir, url, gateway):
+    if url.startswith(gateway):
+        url = url[len(gateway) :]
+    return os.path.join(cache_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+
+# The semaphore is only held while a request is in flight, not while it
+# waits to be retried
+async def request(session, semaphore, method, url):
+    timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=connect_timeout, sock_read=read_timeout
+    )
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                async with session.request(
+                    method, url, allow_redirects=True, timeout=timeout
+                ) as response:
+                    if response.status == 200:
+                        if method == "GET":
+                            return await response.json(content_type=None)
+                        return True
+                    # Anything other than a server error won't change on a retry
+                    if response.status < 500:
+                        raise Exception(
+                            method + " " + url + " returned " + str(response.status)
+                        )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            if attempt == retries - 1:
+                raise Exception(method + " " + url + " failed (" + str(error) + ")")
+        await asyncio.sleep(0.1 * 2**attempt)
+    raise Exception(method + " " + url + " kept failing")
+
+
+async def fetch_metadata(session, semaphore, url, cache_dir, gateway):
+    cache_path = get_cache_path(cache_dir, url, gateway)
+    if os.path.exists(cache_path):
+        with open(cache_path) as cache_file:
+            return json.load(cache_file)
+    document = await request(session, semaphore, "GET", url)
+    with open(cache_path, "w") as cache_file:
+        json.dump(document, cache_file)
+    return document
+
+
+async def check_token(session, semaphore, url, cache_dir, gateway, checked_images):
+    try:
+        document = await fetch_metadata(session, semaphore, url, cache_dir, gateway)
+    except Exception as error:
+        return [str(error)]
+    errors = validate_metadata(document)
+    if errors:
+        return errors
+    # Tokens often share images, each one only needs checking once
+    image_url = get_image_url(document["image"], gateway)
+    if image_url not in checked_images:
+        checked_images[image_url] = asyncio.ensure_future(
+            request(session, semaphore, "HEAD", image_url)
+        )
+    try:
+        await checked_images[image_url]
+    except Exception as error:
+        return ["the image does not load (" + str(error) + ")"]
+    return []
+
+
+# Returns {url: [errors]} for every token whose metadata has a problem
+async def check_metadata_async(
+    urls,
+    cache_dir=default_cache_dir,
+    concurrency=default_concurrency,
+    gateway=default_gateway,
+):
+    os.makedirs(cache_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    checked_images = {}
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            *(
+                check_token(session, semaphore, url, cache_dir, gateway, checked_images)
+                for url in urls
+            )
+        )
+    return dict((url, errors) for url, errors in zip(urls, results) if errors)
+
+
+def check_metadata(urls, **kwargs):
+    return asyncio.run(check_metadata_async(urls, **kwargs))
+
+
+def main(json_folder, max_supply, gateway=default_gateway):
+    urls = get_token_uris(json_folder, int(max_supply), gateway)
+    problems = check_metadata(urls, gateway=gateway)
+    for url, errors in problems.items():
+        print(url + ": " + ", ".join(errors))
+    print(str(len(urls) - len(problems)) + "/" + str(len(urls)) + " tokens are OK")
+    return problems
+
+
+if __name__ == "__main__":
+    if main(*sys.argv[1:]):
+        sys.exit(1)
@@ -0,0 +1,175 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from brownie import FreeMint
+
+from scripts.deploy import deploy_poor_apes_contract, get_owner_account
+from scripts.funded_accounts import FundedAccounts
+
+# $ brownie run scripts/mint_rush.py main 500 detroit
+# Simulates launch day on a local chain: every minter sends its mint at the
+# same time (from a pool of threads, without waiting on the one before) and
+# the tool reports the throughput, how long the mints took to confirm, why
+# the ones that failed reverted and the gas used by each pricing tier.
+#
+# The minters are accounts derived from a mnemonic and funded as they are
+# needed (see funded_accounts.py), split between the whitelist, holders of
+# both free mint NFTs and everyone else (the normal price).
+
+default_mix = {"whitelist": 0.2, "free_mints": 0.1, "normal": 0.7}
+# Enough for a batch of 5, so a mint that reverts isn't estimated first
+mint_gas_limit = 500000
+default_workers = 64
+
+
+def get_tiers(num_minters, mix=default_mix):
+    tiers = []
+    for tier, share in mix.items():
+        tiers += [tier] * int(round(num_minters * share))
+    # Rounding can leave a minter or two over or under
+    tiers = (tiers + ["normal"] * num_minters)[:num_minters]
+    return tiers
+
+
+# Whitelists the minters and mints the free mint NFTs for them, and works
+# out what each of them has to pay. Returns (account, tier, num_nfts, value).
+def setup_minters(
+    contract, num_minters, num_nfts=1, mix=default_mix, owner=None, minter_accounts=None
+):
+    if owner is None:
+        owner = get_owner_account()
+    if minter_accounts is None:
+        minter_accounts = FundedAccounts()
+    accounts = minter_accounts.get_range(0, num_minters)
+    accessories = FreeMint.at(contract.accessories_address())
+    accommodation = FreeMint.at(contract.accommodation_address())
+    minters = []
+    whitelist = []
+    for index, tier in enumerate(get_tiers(num_minters, mix)):
+        account = accounts[index]
+        if tier == "whitelist":
+            whitelist.append(account)
+        if tier == "free_mints":
+            accessories.mint({"from": account})
+            accommodation.mint({"from": account})
+        minters.append([account, tier, num_nfts])
+    for start in range(0, len(whitelist), 200):
+        contract.addManyToWhiteList(whitelist[start : start + 200], {"from": owner})
+    # The discounted tiers can only mint two at their price
+    for minter in minters:
+        if minter[1] != "normal":
+            minter[2] = min(num_nfts, contract.max_batch_wl())
+        minter.append(contract.mint_cost(minter[2], {"from": minter[0]}))
+    return [tuple(minter) for minter in minters]
+
+
+def send_mint(contract, minter):
+    account, tier, num_nfts, value = minter
+    sent = time.time()
+    tx = contract.mint(
+        num_nfts,
+        {
+            "from": account,
+            "value": value,
+            "gas_limit": mint_gas_limit,
+            "required_confs": 0,
+            "allow_revert": True,
+        },
+    )
+    tx.wait(1)
+    result = {
+        "tier": tier,
+        "status": tx.status,
+        "gas_used": tx.gas_used,
+        "latency": time.time() - sent,
+        "revert_msg": None,
+    }
+    if tx.status != 1:
+        result["revert_msg"] = tx.revert_msg or "unknown"
+    return result
+
+
+def get_percentile(values, percentile):
+    values = sorted(values)
+    return values[int(round(percentile / 100 * (len(values) - 1)))]
+
+
+def run_rush(contract, minters, workers=default_workers):
+    supply_before = contract.totalSupply()
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(lambda minter: send_mint(contract, minter), minters)
+        )
+    duration = time.time() - started
+    latencies = [result["latency"] for result in results]
+    report = {
+        "transactions": len(results),
+        "succeeded": len([result for result in results if result["status"] == 1]),
+        "minted": contract.totalSupply() - supply_before,
+        "duration": duration,
+        "tx_per_second": len(results) / duration,
+        "latency": dict(
+            ("p" + str(percentile), get_percentile(latencies, percentile))
+            for percentile in [50, 90, 99, 100]
+        ),
+        "reverts": dict(
+            Counter(result["revert_msg"] for result in results if result["revert_msg"])
+        ),
+        "gas": {},
+    }
+    for tier in sorted(set(result["tier"] for result in results)):
+        gas = [
+            result["gas_used"]
+            for result in results
+            if result["tier"] == tier and result["status"] == 1
+        ]
+        if gas:
+            report["gas"][tier] = {
+                "mints": len(gas),
+                "mean": sum(gas) // len(gas),
+                "max": max(gas),
+            }
+    return report
+
+
+def print_report(report):
+    print(
+        str(report["succeeded"])
+        + "/"
+        + str(report["transactions"])
+        + " mints succeeded, "
+        + str(report["minted"])
+        + " NFTs minted in "
+        + "{:.2f}".format(report["duration"])
+        + "s ({:.1f} tx/s)".format(report["tx_per_second"])
+    )
+    print(
+        "confirmation latency: "
+        + ", ".join(
+            name + " {:.3f}s".format(latency)
+            for name, latency in report["latency"].items()
+        )
+    )
+    for reason, count in report["reverts"].items():
+        print("reverted (" + reason + "): " + str(count))
+    for tier, gas in report["gas"].items():
+        print(
+            "gas ("
+            + tier
+            + "): mean "
+            + str(gas["mean"])
+            + ", max "
+            + str(gas["max"])
+            + " over "
+            + str(gas["mints"])
+            + " mints"
+        )
+
+
+def main(num_minters="500", season="detroit", num_nfts="1"):
+    contract = deploy_poor_apes_contract(19000, season)
+    minters = setup_minters(contract, int(num_minters), int(num_nfts))
+    report = run_rush(contract, minters)
+    print_report(report)
+    return report
@@ -0,0 +1,193 @@
+import time
+import requests
+from brownie import web3
+
+# Sends many owner transactions (deploys, addToWhiteList, withdrawals...)
+# without waiting on each one:
+#
+#   engine = new_engine(get_owner_account())
+#   for chunk in chunks:
+#       submit(engine, contract.addManyToWhiteList, chunk)
+#   receipts = wait_for_all(engine)
+#
+# Nonces are counted locally, so nothing is asked of the node between sends.
+# The EIP-1559 fees come from the last few blocks (eth_feeHistory). A
+# transaction that hasn't been mined after `bump_after` seconds is sent
+# again with the same nonce and higher fees. If a version that was sent
+# before is mined while the bump is being sent, that one is kept. The
+# receipts of everything in flight are fetched with one batched JSON-RPC
+# request per poll.
+
+fee_history_blocks = 10
+# The median tip paid in recent blocks
+fee_history_percentile = 50
+default_priority_fee = 10**9
+# Nodes only accept a replacement that pays at least 10% more
+fee_bump = 1.125
+default_bump_after = 60
+default_poll_interval = 1
+default_timeout = 600
+# What nodes answer when a bump is sent for a nonce that was just used, or
+# that the replacement can't replace (ganache says the nonce isn't correct)
+nonce_taken_errors = [
+    "nonce too low",
+    "correct nonce",
+    "already known",
+    "replacement transaction underpriced",
+]
+
+
+def get_fees():
+    history = web3.eth.fee_history(
+        fee_history_blocks, "latest", [fee_history_percentile]
+    )
+    # The last base fee is the one for the next block
+    base_fee = history["baseFeePerGas"][-1]
+    tips = sorted(reward[0] for reward in history["reward"] if reward[0] > 0)
+    priority_fee = default_priority_fee
+    if tips:
+        priority_fee = tips[len(tips) // 2]
+    # Room for the base fee to double before the transaction is priced out
+    return {"max_fee": base_fee * 2 + priority_fee, "priority_fee": priority_fee}
+
+
+def new_engine(account, bump_after=default_bump_after):
+    return {
+        "account": account,
+        "nonce": account.nonce,
+        "bump_after": bump_after,
+        "pending": [],
+    }
+
+
+def send(engine, entry):
+    tx = entry["function"](
+        *entry["args"],
+        {
+            "from": engine["account"],
+            "nonce": entry["nonce"],
+            "max_fee": entry["fees"]["max_fee"],
+            "priority_fee": entry["fees"]["priority_fee"],
+            "gas_limit": entry["gas_limit"],
+            "required_confs": 0,
+        },
+    )
+    entry["txids"].append(tx.txid)
+    entry["sent_at"] = time.time()
+
+
+# function is a contract function (contract.addToWhiteList) or a contract
+# type's deploy (FreeMint.deploy). Returns the entry that tracks it.
+def submit(engine, function, *args, gas_limit=None):
+    if gas_limit is None:
+        gas_limit = function.estimate_gas(*args, {"from": engine["account"]})
+    entry = {
+        "nonce": engine["nonce"],
+        "function": function,
+        "args": args,
+        "gas_limit": gas_limit,
+        "fees": get_fees(),
+        "txids": [],
+        "receipt": None,
+    }
+    engine["nonce"] += 1
+    send(engine, entry)
+    engine["pending"].append(entry)
+    return entry
+
+
+def get_mined_receipt(entry, receipts):
+    mined = [receipts[txid] for txid in entry["txids"] if receipts.get(txid)]
+    if mined:
+        return mined[0]
+    return None
+
+
+# Sends the transaction again with the same nonce, paying the bumped fees
+# or the current ones, whichever is more. If the node turns it down because
+# the nonce was taken, the versions already sent are checked and the one that
+# was mined is kept as entry["receipt"]. If none of them was mined (yet), the
+# entry is left to wait another `bump_after` seconds.
+def bump(engine, entry):
+    fees = get_fees()
+    for key in ["max_fee", "priority_fee"]:
+        fees[key] = max(fees[key], int(entry["fees"][key] * fee_bump) + 1)
+    previous_fees = entry["fees"]
+    entry["fees"] = fees
+    try:
+        send(engine, entry)
+    except Exception as error:
+        if not any(message in str(error) for message in nonce_taken_errors):
+            raise
+        # Nothing was replaced, the next bump starts from the fees in flight
+        entry["fees"] = previous_fees
+        entry["receipt"] = get_mined_receipt(entry, get_receipts(entry["txids"]))
+        entry["sent_at"] = time.time()
+
+
+# One JSON-RPC batch request for all the receipts. Providers that aren't
+# HTTP get one request per transaction.
+def get_receipts(txids):
+    endpoint = getattr(web3.provider, "endpoint_uri", None)
+    if not endpoint or not str(endpoint).startswith("http"):
+        return dict(
+            (
+                txid,
+                web3.provider.make_request("eth_getTransactionReceipt", [txid])[
+                    "result"
+                ],
+            )
+            for txid in txids
+        )
+    batch = [
+        {
+            "jsonrpc": "2.0",
+            "id": index,
+            "method": "eth_getTransactionReceipt",
+            "params": [txid],
+        }
+        for index, txid in enumerate(txids)
+    ]
+    responses = requests.post(endpoint, json=batch, timeout=30).json()
+    receipts = {}
+    for response in responses:
+        receipts[txids[response["id"]]] = response.get("result")
+    return receipts
+
+
+# Polls until every submitted transaction is mined (one of its versions,
+# if it was bumped). Returns the receipts in the order they were submitted.
+def wait_for_all(engine, timeout=default_timeout, poll_interval=default_poll_interval):
+    started = time.time()
+    done = []
+    while engine["pending"]:
+        txids = [txid for entry in engine["pending"] for txid in entry["txids"]]
+        receipts = get_receipts(txids)
+        still_pending = []
+        for entry in engine["pending"]:
+            entry["receipt"] = get_mined_receipt(entry, receipts)
+            if entry["receipt"] is None and (
+                time.time() - entry["sent_at"] > engine["bump_after"]
+            ):
+                bump(engine, entry)
+            if entry["receipt"] is not None:
+                done.append(entry)
+            else:
+                still_pending.append(entry)
+        engine["pending"] = still_pending
+        if not still_pending:
+            break
+        if time.time() - started > timeout:
+            raise Exception(
+                str(len(still_pending)) + " transactions were not mined in time"
+            )
+        time.sleep(poll_interval)
+    done = sorted(done, key=lambda entry: entry["nonce"])
+    failed = [entry for entry in done if int(entry["receipt"]["status"], 16) != 1]
+    if failed:
+        raise Exception(
+            "The transactions with nonces "
+            + ", ".join(str(entry["nonce"]) for entry in failed)
+            + " reverted"
+        )
+    return [entry["receipt"] for entry in done]
@@ -1,34 +1,166 @@
 import os
 import sys
 import pytest
+from brownie import Wei, accounts, chain, web3, FreeMint
 
 current_wd = os.path.dirname(os.path.realpath(__file__))
 scripts_path = os.path.join(current_wd, os.path.join("..", "scripts"))
 sys.path.append(scripts_path)
 
 import deploy
+from funded_accounts import FundedAccounts
+from price_oracle import set_btc_price
+
+# Accounts past the ones ganache starts with, funded the first time they are
+# used: minters[0] up to minters[1999] for the detroit supply
+minters = FundedAccounts()
+
+
+# Every configuration is deployed once per session and the chain is
+# snapshotted straight after. Each test then gets a clean copy of the
+# contract by reverting to that snapshot when it finishes.
+deployments = {}
+
+
+def cached_deploy(key, deploy_function):
+    if key not in deployments:
+        deployments[key] = deploy_function()
+        chain.snapshot()
+    return deployments[key]
+
+
+def cached_poor_apes_contract(
+    BTC_USD_price, season=None, accessories_contract=None, accommodation_contract=None
+):
+    if season is None:
+        season = "chicago"
+    key = (
+        BTC_USD_price,
+        season,
+        str(accessories_contract),
+        str(accommodation_contract),
+    )
+    return cached_deploy(
+        key,
+        lambda: deploy.deploy_poor_apes_contract(
+            BTC_USD_price, season, accessories_contract, accommodation_contract
+        ),
+    )
+
+
+def isolated_contract(*args):
+    yield cached_poor_apes_contract(*args)
+    chain.revert()
+
+
+# For tests that deploy their own contracts
+@pytest.fixture
+def clean_chain():
+    cached_deploy("clean_chain", lambda: None)
+    yield
+    chain.revert()
 
 
 @pytest.fixture
 def contract():
-    return deploy.deploy_poor_apes_contract(19000)
+    yield from isolated_contract(19000)
 
 
+# The same deployment as contract, with the price feed moved on in place
 @pytest.fixture
-def contract_btc_above_20k():
-    return deploy.deploy_poor_apes_contract(22000)
+def contract_btc_above_20k(contract):
+    set_btc_price(contract, 22000)
+    return contract
 
 
 @pytest.fixture
-def contract_btc_above_30k():
-    return deploy.deploy_poor_apes_contract(32000)
+def contract_btc_above_30k(contract):
+    set_btc_price(contract, 32000)
+    return contract
 
 
 @pytest.fixture
 def contract_new_york():
-    return deploy.deploy_poor_apes_contract(19000, "new_york")
+    yield from isolated_contract(19000, "new_york")
 
 
 @pytest.fixture
 def contract_detroit():
-    return deploy.deploy_poor_apes_contract(19000, "detroit")
+    yield from isolated_contract(19000, "detroit")
+
+
+# Buys the sold-out states. It is one of the minters' accounts, far past the
+# ones the tests use, given its ETH with evm_setAccountBalance rather than by a
+# transfer: the sold-out states are snapshotted, so anything spent from
+# ganache's own accounts would stay spent for the rest of the session.
+sold_out_minter_index = 1000000
+
+
+def get_sold_out_minter(contract):
+    minter = minters.derive(sold_out_minter_index)
+    balance = contract.mint_price() * contract.max_supply() + Wei("10 ether")
+    web3.provider.make_request("evm_setAccountBalance", [minter.address, hex(balance)])
+    return minter
+
+
+# The sold-out state is built on its own deployment (so the plain fixtures
+# above stay unminted) using the largest batches the contract allows and a
+# single read of the mint price.
+def mint_until_sold_out(contract, remaining=0, minter=None):
+    if minter is None:
+        minter = get_sold_out_minter(contract)
+    mint_price = contract.mint_price()
+    max_batch = contract.max_batch()
+    last_token = contract.max_supply() - 1 - remaining
+    minted = contract.totalSupply()
+    while minted < last_token:
+        num_nfts = min(max_batch, last_token - minted)
+        contract.mint(num_nfts, {"from": minter, "value": mint_price * num_nfts})
+        minted += num_nfts
+    return contract
+
+
+def isolated_sold_out_contract(season, remaining):
+    yield cached_deploy(
+        (19000, season, "sold_out", remaining),
+        lambda: mint_until_sold_out(
+            deploy.deploy_poor_apes_contract(19000, season), remaining
+        ),
+    )
+    chain.revert()
+
+
+# Tests using the fixtures below can be run against every season with
+# @pytest.mark.parametrize("season", deploy.seasons)
+@pytest.fixture
+def season():
+    return "chicago"
+
+
+@pytest.fixture
+def contract_for_season(season):
+    yield from isolated_contract(19000, season)
+
+
+@pytest.fixture
+def contract_with_free_mints(season):
+    accessories, accommodation = cached_deploy(
+        "free_mints",
+        lambda: (
+            FreeMint.deploy({"from": accounts[0]}),
+            FreeMint.deploy({"from": accounts[0]}),
+        ),
+    )
+    contract = cached_poor_apes_contract(19000, season, accessories, accommodation)
+    yield contract, accessories, accommodation
+    chain.revert()
+
+
+@pytest.fixture
+def contract_sold_out(season):
+    yield from isolated_sold_out_contract(season, 0)
+
+
+@pytest.fixture
+def contract_almost_sold_out(season):
+    yield from isolated_sold_out_contract(season, 1)
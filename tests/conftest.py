@@ -0,0 +1,98 @@
+import os
+import glob
+import pytest
+from brownie import web3
+
+import gas_report
+import rpc_profiler
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--rpc-profile",
+        action="store",
+        default=None,
+        metavar="PATH",
+        help="count the JSON-RPC requests of each test and write them to PATH",
+    )
+
+
+# `brownie test -n auto` runs each test module on an xdist worker with its own
+# ganache (on port 8545 + the worker number), so every worker has its own
+# accounts and its own cache of deployments in common.py. Brownie only hands
+# tests to the workers if they all use the module_isolation fixture, but its
+# module_isolation resets the chain, which would throw the cached deployments
+# away. Every fixture in common.py already reverts the chain after each test,
+# so nothing needs doing between modules.
+@pytest.fixture(scope="module", autouse=True)
+def module_isolation():
+    yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def rpc_profile(request):
+    if request.config.getoption("--rpc-profile"):
+        rpc_profiler.install(web3)
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    rpc_profiler.start(item.nodeid, "setup")
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    rpc_profiler.start(item.nodeid, "call")
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    rpc_profiler.start(item.nodeid, "teardown")
+    yield
+    rpc_profiler.start(None, None)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if gas_report.measured["gas"]:
+        for line in gas_report.get_report():
+            terminalreporter.write_line(line)
+        if gas_report.update_baseline:
+            terminalreporter.write_line(
+                "gas baseline written to " + gas_report.baseline_path
+            )
+    path = config.getoption("--rpc-profile")
+    if not path or not rpc_profiler.profile["tests"]:
+        return
+    for line in rpc_profiler.get_report():
+        terminalreporter.write_line(line)
+    rpc_profiler.write_json(path)
+    terminalreporter.write_line("JSON-RPC profile written to " + path)
+
+
+def merge_worker_files(path, merge_json):
+    for worker_path in sorted(glob.glob(glob.escape(path) + ".gw*")):
+        merge_json(worker_path)
+        os.remove(worker_path)
+
+
+# xdist workers don't print a summary, so each one writes its own file and
+# the controller merges them (before pytest_terminal_summary runs) into the
+# one report and the one file. The gas baseline is only written by the
+# controller, so workers can't overwrite each other's numbers.
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--rpc-profile")
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker:
+        if path and rpc_profiler.profile["tests"]:
+            rpc_profiler.write_json(path + "." + worker)
+        if gas_report.measured["gas"]:
+            gas_report.write_json(gas_report.baseline_path + "." + worker)
+        return
+    if path:
+        merge_worker_files(path, rpc_profiler.merge_json)
+    merge_worker_files(gas_report.baseline_path, gas_report.merge_json)
+    if gas_report.update_baseline and gas_report.measured["gas"]:
+        gas_report.write_baseline()
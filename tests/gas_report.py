@@ -0,0 +1,91 @@
+import os
+import json
+import warnings
+
+# Keeps the gas used by each path that tests/test_gas.py measures and
+# compares it against tests/gas_baseline.json. The report is printed, and in
+# update mode the baseline is written, once at the end of the session by
+# conftest.py (xdist workers hand their numbers to the controller first).
+
+current_wd = os.path.dirname(os.path.realpath(__file__))
+baseline_path = os.path.join(current_wd, "gas_baseline.json")
+threshold = float(os.environ.get("GAS_REGRESSION_THRESHOLD", "0.01"))
+update_baseline = os.environ.get("GAS_BASELINE_UPDATE") == "1"
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
+baseline = load_json(baseline_path)
+# Wall times are only reported, they vary too much to fail a test on
+measured = {"gas": {}, "time": {}}
+
+
+def check_gas(name, gas_used):
+    measured["gas"][name] = gas_used
+    if update_baseline:
+        return
+    if name not in baseline:
+        # A new path has nothing to regress from, it's added to the baseline
+        # the next time it's updated
+        warnings.warn(
+            name
+            + " is not in tests/gas_baseline.json, run the gas tests with"
+            + " GAS_BASELINE_UPDATE=1 and commit the baseline"
+        )
+        return
+    allowed = int(baseline[name] * (1 + threshold))
+    assert gas_used <= allowed, (
+        name
+        + " used "
+        + str(gas_used)
+        + " gas, the baseline is "
+        + str(baseline[name])
+        + " (allowed "
+        + str(allowed)
+        + ")"
+    )
+
+
+def record_time(name, seconds):
+    measured["time"][name] = seconds
+
+
+def get_report():
+    lines = ["", "gas used (baseline -> now):"]
+    for name in sorted(measured["gas"]):
+        before = baseline.get(name)
+        gas_used = measured["gas"][name]
+        line = "  " + name + ": " + str(before) + " -> " + str(gas_used)
+        if before:
+            line += " ({:+.2%})".format(gas_used / before - 1)
+        lines.append(line)
+    if measured["time"]:
+        lines.append("wall time:")
+    for name in sorted(measured["time"]):
+        lines.append("  " + name + ": {:.2f}s".format(measured["time"][name]))
+    return lines
+
+
+def write_json(path):
+    with open(path, "w") as measured_file:
+        json.dump(measured, measured_file)
+
+
+def merge_json(path):
+    worker_measured = load_json(path)
+    for kind in measured:
+        measured[kind].update(worker_measured[kind])
+
+
+# Paths that weren't measured this time keep their old numbers
+def write_baseline():
+    updated = load_json(baseline_path)
+    updated.update(measured["gas"])
+    with open(baseline_path, "w") as baseline_file:
+        json.dump(updated, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
@@ -0,0 +1,56 @@
+from brownie import accounts, chain, MockV3Aggregator
+
+from deploy import adjust_BTC_USD_price
+
+# Drives the MockV3Aggregator behind a deployed PoorApes, so one deployment
+# can be tested at any BTC price instead of deploying a mock per price:
+#
+#   set_btc_price(contract, 22000)
+#   results = replay_btc_prices(contract, [(0, 19000), (600, 21000)], mint)
+#
+# Prices are in usd, the feed's answers have 8 decimals (see
+# adjust_BTC_USD_price). mint reads the price through a cache that is kept
+# for btc_price_cache_window seconds after it was filled, so a new price is
+# only seen by mint once the cache has expired.
+
+
+def get_price_feed(contract):
+    return MockV3Aggregator.at(contract.priceFeed())
+
+
+# Starts a new round (or overwrites round_id) with the price, updated at
+# `updated_at` (now by default)
+def set_btc_price(contract, usd_price, updated_at=None, round_id=None):
+    price_feed = get_price_feed(contract)
+    if updated_at is None:
+        updated_at = chain.time()
+    if round_id is None:
+        round_id = price_feed.latestRound() + 1
+    price_feed.updateRoundData(
+        round_id,
+        adjust_BTC_USD_price(usd_price),
+        updated_at,
+        updated_at,
+        {"from": accounts[0]},
+    )
+    return round_id
+
+
+def expire_btc_price_cache(contract):
+    chain.sleep(contract.btc_price_cache_window() + 1)
+    chain.mine()
+
+
+# prices is a list of (seconds since the previous price, usd price). Each
+# price is published after the chain has moved on by that many seconds, then
+# on_price(contract, usd_price) is called. Returns what on_price returned for
+# each price.
+def replay_btc_prices(contract, prices, on_price):
+    results = []
+    for seconds, usd_price in prices:
+        if seconds:
+            chain.sleep(seconds)
+            chain.mine()
+        set_btc_price(contract, usd_price)
+        results.append(on_price(contract, usd_price))
+    return results
@@ -0,0 +1,91 @@
+# A pure-Python copy of how PoorApes prices and limits a mint, so that long
+# sequences of actions can be checked without a chain. Every function takes
+# the state dict from new_state() and returns the revert message the contract
+# would give (None if it goes through).
+#
+# Keep this in step with _mint_tier, _mint_cost and _mint_nfts.
+
+max_batch = 5
+max_batch_wl = 2
+max_batch_free_mint_wl = 2
+mint_price_both_free_mints = 0
+
+
+def new_state(owner, max_supply, mint_price, mint_price_whitelist):
+    return {
+        "owner": owner,
+        "max_supply": max_supply,
+        "mint_price": mint_price,
+        "mint_price_whitelist": mint_price_whitelist,
+        "listed": set(),
+        "used": set(),
+        "free_mints": {"accessories": set(), "accommodation": set()},
+        "total_supply": 0,
+        "balances": {},
+    }
+
+
+def owns_both_free_mints(state, address):
+    return (
+        address in state["free_mints"]["accessories"]
+        and address in state["free_mints"]["accommodation"]
+    )
+
+
+def get_tier(state, address):
+    if address in state["used"]:
+        return "normal"
+    if owns_both_free_mints(state, address):
+        return "both_free_mints"
+    if address in state["listed"]:
+        return "whitelist"
+    return "normal"
+
+
+# Returns (cost, revert message)
+def get_mint_cost(state, address, num_nfts):
+    tier = get_tier(state, address)
+    if tier == "both_free_mints":
+        if num_nfts > max_batch_free_mint_wl:
+            return None, "You can not mint that many NFTs (2)"
+        return mint_price_both_free_mints * num_nfts, None
+    if tier == "whitelist":
+        if num_nfts > max_batch_wl:
+            return None, "You can not mint that many NFTs (1)"
+        return state["mint_price_whitelist"] * num_nfts, None
+    if num_nfts > max_batch:
+        return None, "You can not mint that many NFTs (3)"
+    return state["mint_price"] * num_nfts, None
+
+
+def mint(state, address, num_nfts, value):
+    cost, revert_msg = get_mint_cost(state, address, num_nfts)
+    if revert_msg:
+        return revert_msg
+    if cost > value:
+        return "More ETH required to mint"
+    # Only the first token id is checked against the supply
+    if state["total_supply"] >= state["max_supply"] - 1:
+        return "All genesis NFTs minted"
+    if get_tier(state, address) != "normal":
+        state["used"].add(address)
+    state["total_supply"] += num_nfts
+    state["balances"][address] = state["balances"].get(address, 0) + num_nfts
+    return None
+
+
+def add_to_whitelist(state, address):
+    if address == state["owner"]:
+        return "The owner can not be added to the whitelist"
+    state["listed"].add(address)
+    return None
+
+
+def remove_from_whitelist(state, address):
+    state["listed"].discard(address)
+    return None
+
+
+def mint_free_mint(state, address, free_mint):
+    state["free_mints"][free_mint].add(address)
+    return None
@@ -0,0 +1,187 @@
+import json
+import time
+import rlp
+
+# Counts the JSON-RPC requests each test makes and the time they take, split
+# by the test's stage (setup is where the fixtures in common.py run) and by
+# phase (deploying, sending transactions, eth_calls, waiting on receipts).
+# Turned on with `brownie test --rpc-profile rpc_profile.json`, see
+# conftest.py.
+
+phases_by_method = {
+    "eth_call": "call",
+    "eth_estimateGas": "call",
+    "eth_getBalance": "call",
+    "eth_getCode": "call",
+    "eth_getTransactionCount": "call",
+    "eth_getLogs": "call",
+    "eth_sendRawTransaction": "transact",
+    "eth_getTransactionReceipt": "wait",
+    "eth_getTransactionByHash": "wait",
+    "eth_blockNumber": "wait",
+    "eth_getBlockByNumber": "wait",
+    "debug_traceTransaction": "wait",
+    "evm_snapshot": "chain",
+    "evm_revert": "chain",
+    "evm_mine": "chain",
+    "evm_increaseTime": "chain",
+}
+phases = ["deploy", "transact", "call", "wait", "chain", "other"]
+stages = ["setup", "call", "teardown"]
+
+profile = {"test": None, "stage": None, "tests": {}}
+
+
+# The recipient of a signed transaction (b"" when it creates a contract)
+def get_raw_recipient(raw_tx):
+    if isinstance(raw_tx, str):
+        raw_tx = bytes.fromhex(raw_tx[2:] if raw_tx.startswith("0x") else raw_tx)
+    raw_tx = bytes(raw_tx)
+    # Legacy transactions are an RLP list: nonce, gasPrice, gas, to...
+    if raw_tx[0] >= 0xC0:
+        return rlp.decode(raw_tx)[3]
+    # Typed transactions are the type byte and then a list starting with the
+    # chain id: EIP-2930 chainId, nonce, gasPrice, gas, to... and EIP-1559
+    # chainId, nonce, maxPriorityFeePerGas, maxFeePerGas, gas, to...
+    fields = rlp.decode(raw_tx[1:])
+    if raw_tx[0] == 1:
+        return fields[4]
+    return fields[5]
+
+
+def get_phase(method, params):
+    if method == "eth_sendTransaction":
+        # A transaction without a recipient creates a contract
+        if params and not params[0].get("to"):
+            return "deploy"
+        return "transact"
+    if method == "eth_sendRawTransaction":
+        if params and not get_raw_recipient(params[0]):
+            return "deploy"
+        return "transact"
+    return phases_by_method.get(method, "other")
+
+
+def new_totals():
+    return {"requests": 0, "time": 0.0}
+
+
+def new_test():
+    return {
+        "stages": dict((stage, new_totals()) for stage in stages),
+        "phases": dict((phase, new_totals()) for phase in phases),
+        "methods": {},
+    }
+
+
+def add(totals, duration):
+    totals["requests"] += 1
+    totals["time"] += duration
+
+
+def record(method, params, duration):
+    if profile["test"] is None:
+        return
+    test = profile["tests"].setdefault(profile["test"], new_test())
+    add(test["stages"][profile["stage"]], duration)
+    add(test["phases"][get_phase(method, params)], duration)
+    test["methods"][method] = test["methods"].get(method, 0) + 1
+
+
+def middleware(make_request, w3):
+    def profiled_request(method, params):
+        started = time.perf_counter()
+        try:
+            return make_request(method, params)
+        finally:
+            record(method, params, time.perf_counter() - started)
+
+    return profiled_request
+
+
+def install(web3):
+    if "rpc_profiler" not in web3.middleware_onion:
+        web3.middleware_onion.add(middleware, "rpc_profiler")
+
+
+def start(test, stage):
+    profile["test"] = test
+    profile["stage"] = stage
+
+
+def get_total(test):
+    return sum(test["stages"][stage]["time"] for stage in stages)
+
+
+def get_requests(test):
+    return sum(test["stages"][stage]["requests"] for stage in stages)
+
+
+def get_report(top=10):
+    tests = profile["tests"]
+    lines = ["", "JSON-RPC profile (" + str(len(tests)) + " tests):"]
+    methods = {}
+    for test in tests.values():
+        for method, count in test["methods"].items():
+            methods[method] = methods.get(method, 0) + count
+    lines.append("requests by method:")
+    for method in sorted(methods, key=methods.get, reverse=True):
+        lines.append("  " + method + ": " + str(methods[method]))
+    lines.append("slowest tests (setup / call / teardown seconds):")
+    for name in sorted(tests, key=lambda name: get_total(tests[name]), reverse=True)[
+        :top
+    ]:
+        lines.append(
+            "  {:.2f}s ".format(get_total(tests[name]))
+            + " / ".join(
+                "{:.2f}".format(tests[name]["stages"][stage]["time"])
+                for stage in stages
+            )
+            + " "
+            + name
+        )
+    lines.append("chattiest tests (requests):")
+    for name in sorted(tests, key=lambda name: get_requests(tests[name]), reverse=True)[
+        :top
+    ]:
+        lines.append(
+            "  "
+            + str(get_requests(tests[name]))
+            + " "
+            + name
+            + " ("
+            + ", ".join(
+                phase + " " + str(tests[name]["phases"][phase]["requests"])
+                for phase in phases
+                if tests[name]["phases"][phase]["requests"]
+            )
+            + ")"
+        )
+    return lines
+
+
+def write_json(path):
+    with open(path, "w") as profile_file:
+        json.dump(profile["tests"], profile_file, indent=2, sort_keys=True)
+
+
+def add_totals(totals, other):
+    totals["requests"] += other["requests"]
+    totals["time"] += other["time"]
+
+
+# Adds the tests of another profile (an xdist worker's file) to this one
+def merge(tests):
+    for name, other in tests.items():
+        test = profile["tests"].setdefault(name, new_test())
+        for stage in stages:
+            add_totals(test["stages"][stage], other["stages"][stage])
+        for phase in phases:
+            add_totals(test["phases"][phase], other["phases"][phase])
+        for method, count in other["methods"].items():
+            test["methods"][method] = test["methods"].get(method, 0) + count
+
+
+def merge_json(path):
+    with open(path) as profile_file:
+        merge(json.load(profile_file))
@@ -0,0 +1,87 @@
+import pytest
+from brownie import accounts, chain, reverts
+
+from common import contract
+from price_oracle import get_price_feed, set_btc_price, expire_btc_price_cache
+
+
+def mint_one(contract, account):
+    return contract.mint({"from": account, "value": contract.mint_cost()})
+
+
+@pytest.mark.mint
+def test_first_mint_caches_btc_price(contract):
+    price_feed = get_price_feed(contract)
+    assert contract.cached_btc_price() == 0
+    tx = mint_one(contract, accounts[2])
+    assert contract.cached_btc_price() == 19000 * 10**8
+    assert contract.cached_btc_price_read_at() == tx.timestamp
+    assert price_feed.address in [
+        call["to"] for call in tx.subcalls
+    ], "The first mint should call the price feed"
+
+
+@pytest.mark.mint
+def test_cached_btc_price_is_used_inside_the_window(contract):
+    price_feed = get_price_feed(contract)
+    # Fill the cache here, whatever the deployment's round looks like
+    price_feed.updateAnswer(19500 * 10**8, {"from": accounts[0]})
+    mint_one(contract, accounts[2])
+    assert contract.cached_btc_price() == 19500 * 10**8
+    price_feed.updateAnswer(22000 * 10**8, {"from": accounts[0]})
+    # getBTCPrice always asks the price feed
+    assert contract.getBTCPrice() == 22000 * 10**8
+    # but mint uses the cached price until it is older than the window
+    tx = mint_one(contract, accounts[3])
+    assert contract.cached_btc_price() == 19500 * 10**8
+    assert price_feed.address not in [call["to"] for call in tx.subcalls]
+
+
+@pytest.mark.mint
+def test_stale_btc_price_is_refreshed(contract):
+    mint_one(contract, accounts[2])
+    price_feed = get_price_feed(contract)
+    price_feed.updateAnswer(19500 * 10**8, {"from": accounts[0]})
+    expire_btc_price_cache(contract)
+    tx = mint_one(contract, accounts[3])
+    assert contract.cached_btc_price() == contract.getBTCPrice() == 19500 * 10**8
+    assert contract.cached_btc_price_read_at() == tx.timestamp
+    price_feed.updateAnswer(22000 * 10**8, {"from": accounts[0]})
+    expire_btc_price_cache(contract)
+    with reverts("BTC is not under 20k usd"):
+        mint_one(contract, accounts[3])
+
+
+# The window runs from when the price was read, so a round that is already
+# older than the window (the real feed only updates about once an hour) is
+# still cached
+@pytest.mark.mint
+def test_old_round_is_cached_from_when_it_was_read(contract):
+    price_feed = get_price_feed(contract)
+    set_btc_price(contract, 19500, chain.time() - 3600)
+    mint_one(contract, accounts[2])
+    tx = mint_one(contract, accounts[3])
+    assert price_feed.address not in [call["to"] for call in tx.subcalls]
+    assert contract.cached_btc_price() == 19500 * 10**8
+
+
+@pytest.mark.mint
+def test_btc_price_threshold_with_cache_window_disabled(contract):
+    contract.setBTCPriceCacheWindow(0, {"from": accounts[0]})
+    price_feed = get_price_feed(contract)
+    price_feed.updateAnswer(20000 * 10**8, {"from": accounts[0]})
+    with reverts("BTC is not under 20k usd"):
+        mint_one(contract, accounts[2])
+    price_feed.updateAnswer(20000 * 10**8 - 1, {"from": accounts[0]})
+    mint_one(contract, accounts[2])
+    price_feed.updateAnswer(20000 * 10**8, {"from": accounts[0]})
+    with reverts("BTC is not under 20k usd"):
+        mint_one(contract, accounts[2])
+
+
+@pytest.mark.mint
+def test_only_owner_can_set_btc_price_cache_window(contract):
+    with reverts():
+        contract.setBTCPriceCacheWindow(0, {"from": accounts[1]})
+    contract.setBTCPriceCacheWindow(60, {"from": accounts[0]})
+    assert contract.btc_price_cache_window() == 60
@@ -0,0 +1,81 @@
+import os
+import json
+import pytest
+from brownie import accounts
+
+from common import clean_chain
+from build_metadata import (
+    build_season,
+    encode_directory,
+    encode_file,
+    get_cid,
+    load_folders,
+)
+from deploy import deploy_poor_apes_contract
+from metadata_check import validate_metadata
+
+spec = {
+    "description": "A poor ape",
+    "external_url": "https://poorapes.com",
+    "background_color": "ffffff",
+    "images_folder": "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o",
+    "prereveal_image": "ipfs://QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o/0.png",
+    "attributes": {"1": [{"trait_type": "Fur", "value": "Gold"}]},
+}
+
+
+# The hashes `ipfs add` gives an empty folder and a file with "hello world\n"
+@pytest.mark.metadata
+def test_cids_match_ipfs():
+    assert get_cid(encode_directory([])) == (
+        "QmUNLLsPACCz1vLxQVkXqqLX5R1X345qqfHbsf67hvA3Nn"
+    )
+    assert get_cid(encode_file(b"hello world\n")) == (
+        "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+    )
+
+
+@pytest.mark.metadata
+def test_build_season_writes_every_token(tmp_path):
+    folders = build_season("chicago", spec, str(tmp_path), max_supply=40)
+    assert len(folders["json_folder"]) == 46
+    assert len(folders["prereveal_json_folder"]) == 46
+    assert folders["json_folder"] != folders["prereveal_json_folder"]
+    assert load_folders(str(tmp_path)) == folders
+    assert sorted(os.listdir(tmp_path / "json")) == sorted(
+        str(token_id) for token_id in range(40)
+    )
+    with open(tmp_path / "json" / "1") as token_file:
+        document = json.load(token_file)
+    assert validate_metadata(document) == []
+    assert document["name"] == "Poor Apes - Chicago #1"
+    assert document["attributes"] == [{"trait_type": "Fur", "value": "Gold"}]
+    with open(tmp_path / "prereveal" / "1") as token_file:
+        assert json.load(token_file)["image"] == spec["prereveal_image"]
+
+
+# The folder hash doesn't depend on how the work was split up, and files
+# left over from a bigger build are removed
+@pytest.mark.metadata
+def test_build_season_is_deterministic(tmp_path):
+    one_worker = build_season("detroit", spec, str(tmp_path / "a"), 600, workers=1)
+    build_season("detroit", spec, str(tmp_path / "b"), 700, workers=4)
+    four_workers = build_season("detroit", spec, str(tmp_path / "b"), 600, workers=4)
+    assert one_worker == four_workers
+    assert len(os.listdir(tmp_path / "b" / "json")) == 600
+
+
+@pytest.mark.metadata
+@pytest.mark.deploy
+def test_deploy_with_built_metadata(tmp_path, clean_chain):
+    folders = build_season("chicago", spec, str(tmp_path))
+    contract = deploy_poor_apes_contract(
+        19000,
+        "chicago",
+        json_folder=folders["json_folder"],
+        prereveal_json_folder=folders["prereveal_json_folder"],
+    )
+    contract.mint({"from": accounts[2], "value": contract.mint_price()})
+    assert folders["prereveal_json_folder"] in contract.tokenURI(0)
+    contract.disablePrereveal({"from": contract.owner()})
+    assert contract.tokenURI(0).endswith(folders["json_folder"] + "/0")
@@ -1,13 +1,27 @@
 import os
 import sys
+import json
 import pytest
+from brownie import accounts, config, reverts, FreeMint
 
 current_wd = os.path.dirname(os.path.realpath(__file__))
 scripts_path = os.path.join(current_wd, os.path.join("..", "scripts"))
 sys.path.append(scripts_path)
 
-from common import contract
-from deploy import deploy_poor_apes_contract
+from common import contract, clean_chain
+from deploy import (
+    deploy_poor_apes_contract,
+    get_deployment_plan,
+    deploy_from_plan,
+    validate_deployment_plan,
+    estimate_deployment_gas,
+    deploy_all_seasons,
+    load_manifest,
+    get_manifest_contracts,
+    seasons,
+    main,
+    get_args_hash,
+)
 
 
 @pytest.mark.deploy
@@ -32,3 +46,177 @@ def test_cant_use_list_as_BTC_USD_price():
         deploy_poor_apes_contract(["a", "b", "c"])
     except Exception:
         return True
+
+
+@pytest.mark.deploy
+def test_concurrent_deploy_matches_sequential_deploy(clean_chain):
+    contract = deploy_poor_apes_contract(19000, "new_york", concurrent=True)
+    assert "New York" in contract.name(), "The season was not passed through"
+    assert contract.getBTCPrice() == 19000 * 10**8, "The price feed is not the mock"
+    assert (
+        contract.accessories_address() != contract.accommodation_address()
+    ), "The accessories and accommodation contracts should be different"
+    assert contract.ownsBothFreeMints(accounts[1]) == False
+
+
+@pytest.mark.deploy
+def test_deployment_plan_resolves_constructor_arguments():
+    plan = get_deployment_plan(19000, "detroit")
+    assert plan["name"] == "Poor Apes - Detroit"
+    assert plan["ticker"] == config["season"]["detroit"]["ticker"]
+    assert plan["max_supply"] == config["season"]["detroit"]["max_supply"]
+    assert plan["marketing"] == accounts[1].address
+    # On development the dependencies still need deploying
+    assert plan["price_feed"] is None
+    assert plan["accessories"] is None
+    assert plan["accommodation"] is None
+
+
+@pytest.mark.deploy
+def test_deployment_plan_rejects_bad_ipfs_folders():
+    plan = get_deployment_plan(19000)
+    plan["json_folder"] = "Qm-too-short"
+    with pytest.raises(Exception, match="IPFS folder incorrect length"):
+        validate_deployment_plan(plan)
+    plan = get_deployment_plan(19000)
+    plan["prereveal_json_folder"] = plan["prereveal_json_folder"] + "0"
+    with pytest.raises(Exception, match="IPFS pre-reveal folder incorrect length"):
+        validate_deployment_plan(plan)
+
+
+@pytest.mark.deploy
+def test_estimating_deployment_gas_sends_no_transactions():
+    nonce = accounts[0].nonce
+    estimates = estimate_deployment_gas(get_deployment_plan(19000))
+    assert sorted(estimates) == [
+        "accessories",
+        "accommodation",
+        "poor_apes",
+        "price_feed",
+    ]
+    assert all(gas > 0 for gas in estimates.values())
+    assert accounts[0].nonce == nonce, "A dry run should not send transactions"
+
+
+# On development the mock price feed is only planned, not deployed, so the
+# dry run has to know what price it would start at
+@pytest.mark.deploy
+def test_dry_run_from_the_command_line_on_development(monkeypatch):
+    nonce = accounts[0].nonce
+    monkeypatch.setattr(sys, "argv", ["deploy.py", "detroit", "--dry-run"])
+    plan = main()
+    assert plan["season"] == "detroit"
+    assert plan["price_feed"] is None
+    assert plan["BTC_USD_price"] < 20000
+    assert accounts[0].nonce == nonce, "A dry run should not send transactions"
+
+
+@pytest.mark.deploy
+def test_deploy_all_from_the_command_line_uses_the_metadata(
+    monkeypatch, tmp_path, clean_chain
+):
+    built = {}
+    for index, season in enumerate(seasons):
+        folders = {
+            "season": season,
+            "max_supply": config["season"][season]["max_supply"],
+            "json_folder": "Qm" + str(index) * 44,
+            "prereveal_json_folder": "Qm" + str(index + 5) * 44,
+        }
+        os.makedirs(str(tmp_path / "metadata" / season))
+        with open(str(tmp_path / "metadata" / season / "folders.json"), "w") as f:
+            json.dump(folders, f)
+        built[season] = folders
+    monkeypatch.chdir(str(tmp_path))
+    monkeypatch.setattr(
+        sys, "argv", ["deploy.py", "all", "--concurrent", "--metadata=metadata"]
+    )
+    manifest = main()
+    for season, contract in get_manifest_contracts(manifest).items():
+        assert contract.IPFS_prereveal_JSON_Folder() == (
+            built[season]["prereveal_json_folder"]
+        )
+
+
+@pytest.mark.deploy
+def test_deploy_all_seasons_shares_dependencies(tmp_path, clean_chain):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = deploy_all_seasons(19000, manifest_path)
+    assert load_manifest(manifest_path) == manifest
+    assert sorted(manifest["seasons"]) == sorted(seasons)
+    contracts = get_manifest_contracts(manifest)
+    for season, contract in contracts.items():
+        assert contract.max_supply() == config["season"][season]["max_supply"]
+        assert contract.priceFeed() == manifest["dependencies"]["price_feed"]["address"]
+        assert (
+            contract.accessories_address()
+            == manifest["dependencies"]["accessories"]["address"]
+        )
+        assert (
+            contract.accommodation_address()
+            == manifest["dependencies"]["accommodation"]["address"]
+        )
+        assert manifest["seasons"][season]["gas_used"] > 0
+        assert manifest["seasons"][season]["tx"].startswith("0x")
+
+
+@pytest.mark.deploy
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_deploy_resumes_from_checkpoint(tmp_path, clean_chain, concurrent):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    plan = get_deployment_plan(19000, "chicago")
+    # Fail part of the way through: the dependencies go out, PoorApes reverts
+    broken_plan = dict(plan, json_folder="not 46 characters")
+    with reverts("IPFS folder incorrect length"):
+        deploy_from_plan(broken_plan, concurrent, checkpoint_path)
+    with open(checkpoint_path) as checkpoint_file:
+        steps = json.load(checkpoint_file)["steps"]
+    assert sorted(steps) == ["accessories", "accommodation", "price_feed"]
+
+    nonce = accounts[0].nonce
+    contract = deploy_from_plan(plan, concurrent, checkpoint_path)
+    assert accounts[0].nonce == nonce + 1, "Only PoorApes should be deployed"
+    assert contract.accessories_address() == steps["accessories"]["address"]
+    assert contract.accommodation_address() == steps["accommodation"]["address"]
+    assert contract.priceFeed() == steps["price_feed"]["address"]
+
+    # Everything is recorded, so running it again sends nothing
+    assert deploy_from_plan(plan, concurrent, checkpoint_path) == contract
+    assert accounts[0].nonce == nonce + 1
+
+    # but a plan with other constructor arguments gets a new PoorApes
+    changed_plan = dict(plan, prereveal_json_folder="Qm" + "1" * 44)
+    changed = deploy_from_plan(changed_plan, concurrent, checkpoint_path)
+    assert changed != contract
+    assert changed.IPFS_prereveal_JSON_Folder() == "Qm" + "1" * 44
+    assert changed.priceFeed() == contract.priceFeed()
+    assert accounts[0].nonce == nonce + 2
+
+
+# A recorded address without the recorded code is deployed again
+@pytest.mark.deploy
+def test_deploy_checks_the_code_at_checkpointed_addresses(tmp_path, clean_chain):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    plan = get_deployment_plan(19000, "chicago")
+    with open(checkpoint_path, "w") as checkpoint_file:
+        json.dump(
+            {
+                "network": plan["network"],
+                "season": "chicago",
+                "steps": {
+                    "accessories": {
+                        "address": accounts[5].address,
+                        "tx": None,
+                        "code_hash": "0x00",
+                        "args_hash": get_args_hash(FreeMint, [], plan["owner"]),
+                    }
+                },
+            },
+            checkpoint_file,
+        )
+    contract = deploy_from_plan(plan, False, checkpoint_path)
+    assert contract.accessories_address() != accounts[5].address
+    with open(checkpoint_path) as checkpoint_file:
+        steps = json.load(checkpoint_file)["steps"]
+    assert steps["accessories"]["address"] == contract.accessories_address()
+    assert sorted(steps) == ["accessories", "accommodation", "poor_apes", "price_feed"]
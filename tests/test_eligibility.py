@@ -0,0 +1,70 @@
+import csv
+import pytest
+from brownie import accounts
+from eth_utils import to_checksum_address
+
+from common import season, contract_with_free_mints
+from eligibility import get_eligibility, write_eligibility
+
+
+@pytest.mark.whitelist
+def test_eligibility_matches_single_calls(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    contract.addToWhiteList(accounts[3], {"from": accounts[0]})
+    accessories.mint({"from": accounts[4]})
+    accommodation.mint({"from": accounts[4]})
+    contract.addToWhiteList(accounts[5], {"from": accounts[0]})
+    contract.mint(2, {"from": accounts[5], "value": contract.mint_price_whitlist() * 2})
+    addresses = [account.address for account in accounts[2:6]]
+    table = get_eligibility(contract, addresses, num_nfts=2, batch_size=3)
+    assert list(table) == addresses
+    for address in addresses:
+        assert table[address] == {
+            "whitelisted": contract.isInWhiteList(address),
+            "both_free_mints": contract.ownsBothFreeMints(address),
+            "whitelist_used": contract.whitelist_used(address),
+            "balance": contract.balanceOf(address),
+            "mint_cost": contract.mint_cost(2, {"from": address}),
+        }
+    assert table[accounts[3].address]["mint_cost"] == contract.mint_price_whitlist() * 2
+    assert table[accounts[4].address]["mint_cost"] == 0
+    assert table[accounts[5].address]["balance"] == 2
+
+
+# More NFTs than the whitelist price allows makes mint_cost revert
+@pytest.mark.whitelist
+def test_eligibility_reverted_queries_are_none(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    contract.addToWhiteList(accounts[3], {"from": accounts[0]})
+    table = get_eligibility(contract, [accounts[2].address, accounts[3].address], 3)
+    assert table[accounts[2].address]["mint_cost"] == contract.mint_price() * 3
+    assert table[accounts[3].address]["mint_cost"] is None
+    assert table[accounts[3].address]["whitelisted"] == True
+
+
+@pytest.mark.whitelist
+@pytest.mark.long
+def test_eligibility_for_a_large_allowlist(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    addresses = [
+        to_checksum_address((index + 1).to_bytes(20, "big")) for index in range(5000)
+    ]
+    contract.addManyToWhiteList(addresses[:100], {"from": accounts[0]})
+    table = get_eligibility(contract, addresses)
+    assert len(table) == 5000
+    assert sum(1 for row in table.values() if row["whitelisted"]) == 100
+    assert all(row["balance"] == 0 for row in table.values())
+
+
+@pytest.mark.whitelist
+def test_eligibility_is_written_as_csv(contract_with_free_mints, tmp_path):
+    contract, accessories, accommodation = contract_with_free_mints
+    contract.addToWhiteList(accounts[3], {"from": accounts[0]})
+    addresses = [account.address for account in accounts[2:4]]
+    output_path = str(tmp_path / "eligibility.csv")
+    write_eligibility(get_eligibility(contract, addresses), output_path)
+    with open(output_path, newline="") as output_file:
+        rows = list(csv.reader(output_file))
+    assert rows[0][0] == "address"
+    assert [row[0] for row in rows[1:]] == addresses
+    assert [row[1] for row in rows[1:]] == ["False", "True"]
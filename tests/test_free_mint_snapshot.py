@@ -0,0 +1,94 @@
+import json
+import pytest
+from brownie import accounts, chain, reverts
+
+from common import season, contract_with_free_mints
+from free_mint_snapshot import get_both_free_mint_holders, take_snapshot
+from merkle_whitelist import get_root, get_proof
+
+
+def mint_both(accessories, accommodation, account):
+    accessories.mint({"from": account})
+    accommodation.mint({"from": account})
+
+
+def count_calls_to(tx, addresses):
+    return len([call for call in tx.subcalls if call["to"] in addresses])
+
+
+@pytest.mark.whitelist_free_mints
+def test_snapshot_follows_transfers_up_to_the_block(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    from_block = chain.height
+    mint_both(accessories, accommodation, accounts[2])
+    accessories.mint({"from": accounts[3]})
+    mint_both(accessories, accommodation, accounts[4])
+    # accounts[4] gives its accommodation token (the second one) to accounts[3]
+    accommodation.transferFrom(accounts[4], accounts[3], 1, {"from": accounts[4]})
+    block = chain.height
+    # After the snapshot block
+    mint_both(accessories, accommodation, accounts[5])
+    assert get_both_free_mint_holders(contract, block, from_block) == sorted(
+        [accounts[2].address, accounts[3].address]
+    )
+    assert get_both_free_mint_holders(contract, chain.height, from_block) == sorted(
+        [accounts[2].address, accounts[3].address, accounts[5].address]
+    )
+
+
+@pytest.mark.whitelist_free_mints
+def test_snapshot_freezes_the_free_mint_price(contract_with_free_mints, tmp_path):
+    contract, accessories, accommodation = contract_with_free_mints
+    free_mints = [accessories.address, accommodation.address]
+    from_block = chain.height
+    mint_both(accessories, accommodation, accounts[2])
+    mint_both(accessories, accommodation, accounts[3])
+    proofs_path = str(tmp_path / "proofs.json")
+    levels = take_snapshot(
+        contract,
+        chain.height,
+        from_block,
+        str(tmp_path / "snapshot.csv"),
+        proofs_path,
+    )
+    with open(proofs_path) as proofs_file:
+        assert json.load(proofs_file)["root"] == get_root(levels)
+    with reverts():
+        contract.setFreeMintMerkleRoot(get_root(levels), {"from": accounts[2]})
+    contract.setFreeMintMerkleRoot(get_root(levels), {"from": accounts[0]})
+    # Bought after the snapshot, so still the normal price
+    mint_both(accessories, accommodation, accounts[4])
+    assert contract.mint_cost(1, {"from": accounts[4]}) == contract.mint_price()
+    # Moving the free mints away doesn't take the price away
+    accessories.transferFrom(accounts[2], accounts[6], 0, {"from": accounts[2]})
+    proof = get_proof(levels, accounts[2])
+    assert contract.isInFreeMintSnapshot(accounts[2], proof) == True
+    assert contract.isInFreeMintSnapshot(accounts[4], proof) == False
+    assert contract.mint_cost(2, [], proof, {"from": accounts[2]}) == 0
+    tx = contract.mint(2, [], proof, {"from": accounts[2], "value": 0})
+    assert contract.balanceOf(accounts[2]) == 2
+    assert contract.whitelist_used(accounts[2]) == True
+    assert count_calls_to(tx, free_mints) == 0
+    # Without its proof a snapshot holder pays the normal price
+    with reverts("More ETH required to mint"):
+        contract.mint(1, {"from": accounts[3], "value": 0})
+    # and the proofs can't be swapped
+    with reverts("More ETH required to mint"):
+        contract.mint(1, [], proof, {"from": accounts[3], "value": 0})
+    tx = contract.mint(1, {"from": accounts[3], "value": contract.mint_price()})
+    assert count_calls_to(tx, free_mints) == 0
+
+
+@pytest.mark.whitelist_free_mints
+def test_snapshot_needs_both_free_mint_holders(contract_with_free_mints, tmp_path):
+    contract, accessories, accommodation = contract_with_free_mints
+    from_block = chain.height
+    accessories.mint({"from": accounts[2]})
+    with pytest.raises(Exception, match="Nobody holds both free mints"):
+        take_snapshot(
+            contract,
+            chain.height,
+            from_block,
+            str(tmp_path / "snapshot.csv"),
+            str(tmp_path / "proofs.json"),
+        )
@@ -0,0 +1,45 @@
+import pytest
+from brownie import accounts
+
+from common import contract, minters
+from funded_accounts import FundedAccounts, default_funding
+
+
+@pytest.mark.funded_accounts
+def test_minters_are_derived_and_funded_on_first_use(contract):
+    assert FundedAccounts().derive(1999).address == minters[1999].address
+    assert minters[1999] not in accounts
+    assert minters[0].address == "0xDD60294F3d7A475ABa28BfB04db13F180CDC730a"
+    # None of them is one of the node's own accounts (the owner, marketing...)
+    node_addresses = [account.address for account in accounts]
+    assert all(
+        minters.derive(index).address not in node_addresses for index in range(20)
+    )
+    assert minters[1999].balance() == default_funding
+    contract.mint({"from": minters[1999], "value": contract.mint_price()})
+    assert contract.balanceOf(minters[1999]) == 1
+
+
+# The contract fixture reverts the chain after each test, funding included
+reverted = FundedAccounts()
+
+
+@pytest.mark.funded_accounts
+def test_minters_are_funded(contract):
+    assert reverted[1234].balance() == default_funding
+
+
+@pytest.mark.funded_accounts
+def test_minters_are_funded_again_after_a_revert(contract):
+    assert reverted.derive(1234).balance() == 0
+    assert reverted[1234].balance() == default_funding
+
+
+@pytest.mark.funded_accounts
+def test_minters_can_be_funded_in_bulk(contract):
+    funded = FundedAccounts(faucets=[accounts[8], accounts[9]])
+    before = accounts[8].balance()
+    batch = funded[100:150]
+    assert len(batch) == 50
+    assert all(account.balance() == default_funding for account in batch)
+    assert accounts[8].balance() <= before - default_funding * 25
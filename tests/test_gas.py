@@ -0,0 +1,150 @@
+import os
+import time
+import pytest
+from brownie import accounts
+
+from common import (
+    clean_chain,
+    season,
+    contract_for_season,
+    contract_with_free_mints,
+    contract_sold_out,
+)
+from deploy import seasons, get_deployment_plan, deploy_from_plan
+from gas_report import check_gas, record_time
+from merkle_whitelist import build_tree, get_root, get_proof
+
+# $ brownie test -m gas
+# Compares the gas used by each path against tests/gas_baseline.json and
+# fails if any of them got more expensive than the threshold allows. A path
+# that isn't in the baseline yet only gives a warning. To accept new numbers
+# (and add new paths), then commit tests/gas_baseline.json:
+# $ GAS_BASELINE_UPDATE=1 brownie test -m gas
+# See gas_report.py, the baseline is written once at the end of the session.
+
+
+def mint_gas(contract, minter, num_nfts):
+    value = contract.mint_cost(num_nfts, {"from": minter})
+    return contract.mint(num_nfts, {"from": minter, "value": value}).gas_used
+
+
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+def test_deploy_gas(season, clean_chain):
+    contract = deploy_from_plan(get_deployment_plan(19000, season))
+    check_gas(season + ".deploy", contract.tx.gas_used)
+
+
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+@pytest.mark.parametrize("num_nfts", [1, 2, 3, 4, 5])
+def test_mint_gas_normal(season, num_nfts, contract_for_season):
+    gas_used = mint_gas(contract_for_season, accounts[2], num_nfts)
+    check_gas(season + ".mint.normal." + str(num_nfts), gas_used)
+
+
+# A mint during a rush, when an earlier mint has already cached the BTC price
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+def test_mint_gas_cached_btc_price(season, contract_for_season):
+    mint_gas(contract_for_season, accounts[5], 1)
+    gas_used = mint_gas(contract_for_season, accounts[2], 1)
+    check_gas(season + ".mint.normal.cached_btc_price", gas_used)
+
+
+# Whitelisted and free mint minters can only mint two at their price
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+@pytest.mark.parametrize("num_nfts", [1, 2])
+def test_mint_gas_whitelist(season, num_nfts, contract_for_season):
+    contract_for_season.addToWhiteList(accounts[3], {"from": accounts[0]})
+    gas_used = mint_gas(contract_for_season, accounts[3], num_nfts)
+    check_gas(season + ".mint.whitelist." + str(num_nfts), gas_used)
+
+
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+@pytest.mark.parametrize("num_nfts", [1, 2])
+def test_mint_gas_both_free_mints(season, num_nfts, contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    accessories.mint({"from": accounts[4]})
+    accommodation.mint({"from": accounts[4]})
+    gas_used = mint_gas(contract, accounts[4], num_nfts)
+    check_gas(season + ".mint.both_free_mints." + str(num_nfts), gas_used)
+
+
+# The same minter on a free mint snapshot of 1,000 holders
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+@pytest.mark.parametrize("num_nfts", [1, 2])
+def test_mint_gas_free_mint_snapshot(season, num_nfts, contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    holders = ["0x" + os.urandom(20).hex() for _ in range(999)]
+    levels = build_tree(holders + [accounts[4].address])
+    contract.setFreeMintMerkleRoot(get_root(levels), {"from": accounts[0]})
+    tx = contract.mint(
+        num_nfts, [], get_proof(levels, accounts[4]), {"from": accounts[4], "value": 0}
+    )
+    assert contract.whitelist_used(accounts[4]) == True
+    check_gas(season + ".mint.free_mint_snapshot." + str(num_nfts), tx.gas_used)
+
+
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+def test_add_to_whitelist_gas(season, contract_for_season):
+    tx = contract_for_season.addToWhiteList(accounts[3], {"from": accounts[0]})
+    check_gas(season + ".addToWhiteList", tx.gas_used)
+
+
+@pytest.mark.gas
+@pytest.mark.parametrize("season", seasons)
+def test_disable_prereveal_gas(season, contract_for_season):
+    tx = contract_for_season.disablePrereveal({"from": accounts[0]})
+    check_gas(season + ".disablePrereveal", tx.gas_used)
+
+
+@pytest.mark.gas
+@pytest.mark.long
+@pytest.mark.parametrize("season", seasons)
+def test_withdraw_gas(season, contract_sold_out):
+    tx = contract_sold_out.withdraw_marketing({"from": accounts[1]})
+    check_gas(season + ".withdraw_marketing", tx.gas_used)
+    tx = contract_sold_out.withdraw_owner({"from": accounts[0]})
+    check_gas(season + ".withdraw_owner", tx.gas_used)
+
+
+def count_calls_to(tx, addresses):
+    return len([call for call in tx.subcalls if call["to"] in addresses])
+
+
+# The pricing tier is worked out once per mint: the free mint contracts are
+# called at most once each, and not at all once the discount has been used
+@pytest.mark.gas
+def test_mint_resolves_pricing_tier_once(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    free_mints = [accessories.address, accommodation.address]
+    tx = contract.mint(1, {"from": accounts[2], "value": contract.mint_price()})
+    assert count_calls_to(tx, free_mints) == 2
+    assert count_calls_to(tx, [contract.priceFeed()]) == 1
+    contract.addToWhiteList(accounts[3], {"from": accounts[0]})
+    contract.mint(2, {"from": accounts[3], "value": contract.mint_price_whitlist() * 2})
+    assert contract.whitelist_used(accounts[3]) == True
+    tx = contract.mint(1, {"from": accounts[3], "value": contract.mint_price()})
+    assert count_calls_to(tx, free_mints) == 0
+
+
+# What an indexer pays to read every tokenURI of the biggest season
+@pytest.mark.gas
+@pytest.mark.long
+@pytest.mark.parametrize("season", ["detroit"])
+def test_token_uri_gas_for_the_whole_season(season, contract_sold_out):
+    contract_sold_out.disablePrereveal({"from": accounts[0]})
+    token_ids = range(contract_sold_out.totalSupply())
+    started = time.time()
+    for token_id in token_ids:
+        contract_sold_out.tokenURI(token_id)
+    record_time(season + ".tokenURI.all_tokens", time.time() - started)
+    gas_used = sum(
+        contract_sold_out.tokenURI.estimate_gas(token_id) for token_id in token_ids
+    )
+    check_gas(season + ".tokenURI.all_tokens", gas_used)
@@ -0,0 +1,109 @@
+import pytest
+from brownie import accounts, chain
+
+from common import contract, season, contract_sold_out, minters, sold_out_minter_index
+from holder_index import (
+    open_index,
+    update_index,
+    get_checkpoint,
+    get_owner,
+    get_tokens,
+    get_holders,
+)
+
+
+def mint(contract, account, num_nfts):
+    contract.mint(
+        num_nfts,
+        {"from": account, "value": contract.mint_cost(num_nfts, {"from": account})},
+    )
+
+
+def assert_index_matches_contract(connection, contract):
+    for token_id in range(contract.totalSupply()):
+        assert get_owner(connection, contract, token_id) == contract.ownerOf(
+            token_id
+        ), ("token " + str(token_id) + " has the wrong owner")
+    for owner, balance in get_holders(connection, contract).items():
+        assert contract.balanceOf(owner) == balance
+        assert len(get_tokens(connection, contract, owner)) == balance
+
+
+@pytest.mark.mint
+def test_holder_index_follows_mints_and_transfers(contract, tmp_path):
+    connection = open_index(str(tmp_path / "holders.db"))
+    from_block = chain.height
+    mint(contract, accounts[2], 5)
+    mint(contract, accounts[3], 3)
+    contract.transferFrom(accounts[2], accounts[4], 1, {"from": accounts[2]})
+    # Small pages so the index is built over several of them
+    assert update_index(connection, contract, from_block, page_size=2) == 9
+    assert get_checkpoint(connection, contract.address) == chain.height
+    assert get_tokens(connection, contract, accounts[2]) == [0, 2, 3, 4]
+    assert get_tokens(connection, contract, accounts[4]) == [1]
+    assert get_holders(connection, contract) == {
+        accounts[2].address: 4,
+        accounts[3].address: 3,
+        accounts[4].address: 1,
+    }
+    assert_index_matches_contract(connection, contract)
+
+
+@pytest.mark.mint
+def test_holder_index_only_processes_new_blocks(contract, tmp_path):
+    db_path = str(tmp_path / "holders.db")
+    from_block = chain.height
+    mint(contract, accounts[2], 5)
+    assert update_index(open_index(db_path), contract, from_block) == 5
+    # Nothing new, nothing to do
+    assert update_index(open_index(db_path), contract, from_block) == 0
+    mint(contract, accounts[3], 2)
+    contract.transferFrom(accounts[2], accounts[3], 0, {"from": accounts[2]})
+    connection = open_index(db_path)
+    assert update_index(connection, contract, from_block) == 3
+    assert get_holders(connection, contract) == {
+        accounts[2].address: 4,
+        accounts[3].address: 3,
+    }
+    assert_index_matches_contract(connection, contract)
+
+
+@pytest.mark.mint
+@pytest.mark.long
+@pytest.mark.parametrize("season", ["detroit"])
+def test_holder_index_for_a_sold_out_season(contract_sold_out, tmp_path):
+    connection = open_index(str(tmp_path / "holders.db"))
+    seller = minters.derive(sold_out_minter_index)
+    for token_id in range(0, 100, 3):
+        contract_sold_out.transferFrom(
+            seller, accounts[3 + token_id % 5], token_id, {"from": seller}
+        )
+    assert update_index(connection, contract_sold_out, page_size=100) == (
+        contract_sold_out.totalSupply() + 34
+    )
+    assert_index_matches_contract(connection, contract_sold_out)
+
+
+@pytest.mark.mint
+def test_holder_index_rescans_unconfirmed_blocks(contract, tmp_path):
+    connection = open_index(str(tmp_path / "holders.db"))
+    from_block = chain.height
+    mint(contract, accounts[2], 5)
+    mint(contract, accounts[3], 3)
+    assert update_index(connection, contract, from_block) == 8
+    # The blocks since the checkpoint are scanned again, but transfers that
+    # are indexed already aren't applied twice
+    assert update_index(connection, contract, from_block, confirmations=100) == 0
+    assert get_holders(connection, contract) == {
+        accounts[2].address: 5,
+        accounts[3].address: 3,
+    }
+    # A reorg: accounts[3]'s mint is dropped and accounts[4] mints in its block
+    chain.undo()
+    mint(contract, accounts[4], 2)
+    assert update_index(connection, contract, from_block) == 2
+    assert get_holders(connection, contract) == {
+        accounts[2].address: 5,
+        accounts[4].address: 2,
+    }
+    assert_index_matches_contract(connection, contract)
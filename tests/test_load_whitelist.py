@@ -0,0 +1,69 @@
+import os
+import json
+import pytest
+from brownie import accounts
+
+from common import contract
+from load_whitelist import load_whitelist, get_progress_path, get_csv_hash
+
+
+def write_whitelist_csv(tmp_path, num_addresses):
+    addresses = ["0x" + os.urandom(20).hex() for _ in range(num_addresses)]
+    csv_path = str(tmp_path / "whitelist.csv")
+    with open(csv_path, "w") as csv_file:
+        csv_file.write("address\n")
+        for address in addresses:
+            csv_file.write(address + "\n")
+        # The owner can't be whitelisted so it is skipped
+        csv_file.write(accounts[0].address + "\n")
+    return csv_path, addresses
+
+
+@pytest.mark.whitelist
+def test_load_whitelist_in_chunks(contract, tmp_path):
+    csv_path, addresses = write_whitelist_csv(tmp_path, 50)
+    nonce = accounts[0].nonce
+    assert load_whitelist(contract, csv_path, chunk_size=8) == []
+    assert accounts[0].nonce == nonce + 7, "50 addresses should take 7 chunks"
+    for address in addresses:
+        assert contract.isInWhiteList(address) == True
+    assert contract.isInWhiteList(accounts[0]) == False
+    with open(get_progress_path(csv_path)) as progress_file:
+        progress = json.load(progress_file)
+    assert progress["confirmed"] == [0, 8, 16, 24, 32, 40, 48]
+    # Running it again doesn't send anything
+    assert load_whitelist(contract, csv_path, chunk_size=8) == []
+    assert accounts[0].nonce == nonce + 7
+
+
+@pytest.mark.whitelist
+def test_load_whitelist_resumes_from_progress_file(contract, tmp_path):
+    csv_path, addresses = write_whitelist_csv(tmp_path, 20)
+    with open(get_progress_path(csv_path), "w") as progress_file:
+        json.dump(
+            {
+                "contract": contract.address,
+                "csv_hash": get_csv_hash(csv_path),
+                "chunk_size": 10,
+                "confirmed": [0],
+            },
+            progress_file,
+        )
+    # The chunk size in the progress file wins
+    assert load_whitelist(contract, csv_path, chunk_size=3) == []
+    for address in addresses[:10]:
+        assert contract.isInWhiteList(address) == False
+    for address in addresses[10:]:
+        assert contract.isInWhiteList(address) == True
+
+
+@pytest.mark.whitelist
+def test_load_whitelist_refuses_to_resume_with_another_csv(contract, tmp_path):
+    csv_path, addresses = write_whitelist_csv(tmp_path, 20)
+    assert load_whitelist(contract, csv_path, chunk_size=8) == []
+    # Same file name, other addresses: the confirmed rows are not these rows
+    write_whitelist_csv(tmp_path, 20)
+    nonce = accounts[0].nonce
+    with pytest.raises(Exception, match="The csv changed"):
+        load_whitelist(contract, csv_path, chunk_size=8)
+    assert accounts[0].nonce == nonce
@@ -0,0 +1,104 @@
+import os
+import json
+import random
+import pytest
+from brownie import accounts, reverts
+
+from common import contract
+from merkle_whitelist import (
+    build_tree,
+    build_tree_from_file,
+    export_proofs,
+    get_root,
+    get_proof,
+    verify_proof,
+)
+
+
+def random_addresses(num_addresses):
+    return ["0x" + os.urandom(20).hex() for _ in range(num_addresses)]
+
+
+def set_merkle_root(contract, levels):
+    contract.setWhiteListMerkleRoot(get_root(levels), {"from": accounts[0]})
+
+
+@pytest.mark.whitelist
+def test_merkle_whitelist_mint(contract):
+    buyer = accounts[3]
+    levels = build_tree(random_addresses(99) + [buyer.address])
+    proof = get_proof(levels, buyer)
+    normal_mint_cost = contract.mint_cost(2, {"from": buyer})
+    # Without a root nobody is on the merkle whitelist
+    assert contract.isInMerkleWhiteList(buyer, proof) == False
+    with reverts():
+        contract.setWhiteListMerkleRoot(get_root(levels), {"from": buyer})
+    set_merkle_root(contract, levels)
+    assert contract.isInMerkleWhiteList(buyer, proof) == True
+    assert contract.isInMerkleWhiteList(accounts[4], proof) == False
+    wl_mint_cost = contract.mint_cost(2, proof, {"from": buyer})
+    assert wl_mint_cost == contract.mint_price_whitlist() * 2
+    assert wl_mint_cost < normal_mint_cost
+    # Without the proof the buyer pays the normal price
+    with reverts("More ETH required to mint"):
+        contract.mint(2, {"from": buyer, "value": wl_mint_cost})
+    with reverts("You can not mint that many NFTs (1)"):
+        contract.mint(3, proof, {"from": buyer, "value": wl_mint_cost})
+    contract.mint(2, proof, {"from": buyer, "value": wl_mint_cost})
+    assert contract.balanceOf(buyer) == 2
+    # The whitelist price can only be used once
+    assert contract.whitelist_used(buyer) == True
+    with reverts("More ETH required to mint"):
+        contract.mint(2, proof, {"from": buyer, "value": wl_mint_cost})
+    assert contract.mint_cost(2, proof, {"from": buyer}) == normal_mint_cost
+
+
+@pytest.mark.whitelist
+def test_merkle_proofs_export(tmp_path):
+    addresses = random_addresses(10)
+    addresses_path = str(tmp_path / "whitelist.csv")
+    with open(addresses_path, "w") as addresses_file:
+        addresses_file.write("address\n" + "\n".join(addresses + addresses[:3]))
+    levels = build_tree_from_file(addresses_path)
+    proofs_path = str(tmp_path / "proofs.json")
+    export_proofs(levels, addresses_path, proofs_path)
+    with open(proofs_path) as proofs_file:
+        exported = json.load(proofs_file)
+    assert exported["root"] == get_root(levels)
+    assert len(exported["proofs"]) == 10
+    for address, proof in exported["proofs"].items():
+        assert verify_proof(exported["root"], address, proof)
+
+
+@pytest.mark.whitelist
+@pytest.mark.parametrize("num_addresses", [1, 2, 3, 65])
+def test_merkle_tree_sizes_agree_with_contract(contract, num_addresses):
+    addresses = random_addresses(num_addresses)
+    levels = build_tree(addresses)
+    set_merkle_root(contract, levels)
+    for address in addresses:
+        proof = get_proof(levels, address)
+        assert verify_proof(get_root(levels), address, proof)
+        assert contract.isInMerkleWhiteList(address, proof) == True, (
+            str(address) + " should be on the merkle whitelist"
+        )
+
+
+@pytest.mark.whitelist
+@pytest.mark.long
+def test_merkle_tree_agrees_with_contract_for_many_addresses(contract):
+    addresses = random_addresses(30000)
+    levels = build_tree(addresses)
+    root = get_root(levels)
+    set_merkle_root(contract, levels)
+    for address in addresses:
+        proof = get_proof(levels, address)
+        assert verify_proof(root, address, proof)
+        assert contract.isInMerkleWhiteList(address, proof) == True, (
+            str(address) + " should be on the merkle whitelist"
+        )
+    # A proof doesn't work for another address
+    outsider = random_addresses(1)[0]
+    proof = get_proof(levels, random.choice(addresses))
+    assert verify_proof(root, outsider, proof) == False
+    assert contract.isInMerkleWhiteList(outsider, proof) == False
@@ -0,0 +1,154 @@
+import json
+import asyncio
+import pytest
+from aiohttp import web
+from brownie import accounts
+
+from common import contract
+from metadata_check import (
+    check_metadata_async,
+    get_token_uris,
+    validate_metadata,
+)
+
+json_folder = "QmTestFolder"
+
+
+def token_json(token_id):
+    return {
+        "name": "Poor Ape #" + str(token_id),
+        "description": "A poor ape",
+        "image": "ipfs://QmImages/" + str(token_id % 10) + ".png",
+        "external_url": "https://poorapes.com",
+        "background_color": "ffffff",
+        "attributes": [{"trait_type": "Fur", "value": "Brown"}],
+    }
+
+
+# A stand-in for the IPFS gateway that serves a season's metadata, with a few
+# broken tokens, and counts the requests it gets (and how many of them it was
+# answering at once, each answer takes `delay` seconds)
+def get_gateway(max_supply, broken, delay=0, in_flight=None):
+    requests = []
+    if in_flight is None:
+        in_flight = {"now": 0, "max": 0}
+
+    async def metadata(request):
+        requests.append(request.path)
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(delay)
+        in_flight["now"] -= 1
+        token_id = int(request.match_info["token_id"])
+        if token_id >= max_supply or broken.get(token_id) == "missing":
+            raise web.HTTPNotFound()
+        document = token_json(token_id)
+        if broken.get(token_id) == "no_name":
+            del document["name"]
+        if broken.get(token_id) == "bad_image":
+            document["image"] = "ipfs://QmImages/missing.png"
+        return web.Response(text=json.dumps(document))
+
+    async def image(request):
+        requests.append(request.path)
+        if request.match_info["name"] == "missing.png":
+            raise web.HTTPNotFound()
+        return web.Response(body=b"png")
+
+    app = web.Application()
+    app.router.add_get("/ipfs/" + json_folder + "/{token_id}", metadata)
+    app.router.add_route("HEAD", "/ipfs/QmImages/{name}", image)
+    return app, requests
+
+
+async def run_check(app, max_supply, cache_dir, concurrency=8):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    gateway = "http://127.0.0.1:" + str(port) + "/ipfs/"
+    try:
+        urls = get_token_uris(json_folder, max_supply, gateway)
+        problems = await check_metadata_async(
+            urls, cache_dir=cache_dir, concurrency=concurrency, gateway=gateway
+        )
+    finally:
+        await runner.cleanup()
+    return dict((url[len(gateway) :], errors) for url, errors in problems.items())
+
+
+@pytest.mark.metadata
+def test_validate_metadata():
+    assert validate_metadata(token_json(0)) == []
+    document = token_json(0)
+    del document["external_url"]
+    assert validate_metadata(document) == ["the external_url key is not in the JSON"]
+    document = token_json(0)
+    document["image"] = "not a link"
+    assert validate_metadata(document) == ["the image is not a link"]
+    document = token_json(0)
+    document["attributes"] = [{"value": "Brown"}]
+    assert len(validate_metadata(document)) == 1
+    assert validate_metadata([]) == ["the metadata is not a JSON object"]
+
+
+@pytest.mark.metadata
+def test_token_uris_match_the_contract(contract):
+    contract.mint(3, {"from": accounts[2], "value": contract.mint_price() * 3})
+    contract.disablePrereveal({"from": accounts[0]})
+    json_folder = contract.tokenURI(0).split("/")[-2]
+    urls = get_token_uris(json_folder, 3)
+    assert urls == [contract.tokenURI(token_id) for token_id in range(3)]
+
+
+@pytest.mark.metadata
+def test_check_finds_broken_tokens(tmp_path):
+    broken = {3: "missing", 7: "no_name", 11: "bad_image"}
+    app, requests = get_gateway(200, broken)
+    problems = asyncio.run(run_check(app, 200, str(tmp_path)))
+    assert sorted(problems) == [
+        json_folder + "/11",
+        json_folder + "/3",
+        json_folder + "/7",
+    ]
+    assert "returned 404" in problems[json_folder + "/3"][0]
+    assert problems[json_folder + "/7"] == ["the name key is not in the JSON"]
+    assert "the image does not load" in problems[json_folder + "/11"][0]
+    # Every image is only checked once however many tokens use it
+    image_requests = [path for path in requests if path.startswith("/ipfs/QmImages")]
+    assert len(image_requests) == 11
+
+
+@pytest.mark.metadata
+def test_check_uses_the_cache(tmp_path):
+    app, requests = get_gateway(50, {4: "missing"})
+    problems = asyncio.run(run_check(app, 50, str(tmp_path)))
+    assert list(problems) == [json_folder + "/4"]
+    metadata_requests = [
+        path for path in requests if path.startswith("/ipfs/" + json_folder)
+    ]
+    assert len(metadata_requests) == 50
+
+    # Only the token that failed is fetched again
+    app, requests = get_gateway(50, {})
+    problems = asyncio.run(run_check(app, 50, str(tmp_path)))
+    assert problems == {}
+    metadata_requests = [
+        path for path in requests if path.startswith("/ipfs/" + json_folder)
+    ]
+    assert metadata_requests == ["/ipfs/" + json_folder + "/4"]
+
+
+@pytest.mark.metadata
+def test_check_limits_the_requests_in_flight(tmp_path):
+    in_flight = {"now": 0, "max": 0}
+    app, requests = get_gateway(40, {}, delay=0.05, in_flight=in_flight)
+    problems = asyncio.run(run_check(app, 40, str(tmp_path), concurrency=4))
+    assert problems == {}
+    metadata_requests = [
+        path for path in requests if path.startswith("/ipfs/" + json_folder)
+    ]
+    assert len(metadata_requests) == 40
+    # Ten times as many tokens as the limit, but never more than 4 at once
+    assert in_flight["max"] == 4
@@ -0,0 +1,28 @@
+import pytest
+
+from common import contract
+from mint_rush import get_tiers, setup_minters, run_rush
+
+
+@pytest.mark.mint
+def test_tiers_follow_the_mix():
+    tiers = get_tiers(101, {"whitelist": 0.2, "free_mints": 0.1, "normal": 0.7})
+    assert len(tiers) == 101
+    assert tiers.count("whitelist") == 20
+    assert tiers.count("free_mints") == 10
+
+
+# More minters than NFTs, so the last ones race for the supply cap
+@pytest.mark.mint
+@pytest.mark.long
+def test_mint_rush_stops_at_the_supply_cap(contract):
+    max_supply = contract.max_supply()
+    minters = setup_minters(contract, max_supply + 10, num_nfts=1)
+    report = run_rush(contract, minters, workers=16)
+    assert report["transactions"] == max_supply + 10
+    assert report["minted"] == max_supply - 1
+    assert report["succeeded"] == max_supply - 1
+    assert report["reverts"] == {"All genesis NFTs minted": 11}
+    assert sorted(report["gas"]) == ["free_mints", "normal", "whitelist"]
+    assert report["latency"]["p50"] <= report["latency"]["p100"]
+    assert report["tx_per_second"] > 0
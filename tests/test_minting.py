@@ -2,7 +2,15 @@ import pytest
 import requests
 from brownie import Wei, accounts, reverts, config
 
-from common import contract, contract_btc_above_20k, contract_new_york, contract_detroit
+from common import (
+    contract,
+    contract_btc_above_20k,
+    contract_new_york,
+    contract_detroit,
+    season,
+    contract_sold_out,
+)
+from deploy import seasons
 
 
 # $ brownie console
@@ -97,7 +105,7 @@ def test_can_not_mint_six(contract):
         )
 
 
-@pytest.mark.skip(reason="takes too long")
+@pytest.mark.skip(reason="takes too long, see scripts/metadata_check.py")
 @pytest.mark.mint
 def test_tokenuri_function_returns_json(contract):
     contract.addToWhiteList(accounts[1], {"from": accounts[0]})
@@ -120,10 +128,12 @@ def test_tokenuri_function_returns_json(contract):
 
 @pytest.mark.mint
 @pytest.mark.long
-def test_can_not_mint_more_than_max_supply_chicago_nfts(contract):
-    supply = config["season"]["chicago"]["max_supply"]
-    assert contract.max_supply() == supply
-    for i in range(supply - 1):
-        contract.mint({"from": accounts[i], "value": contract.mint_cost()})
-    with reverts():
-        contract.mint({"from": accounts[supply], "value": contract.mint_cost()})
+@pytest.mark.parametrize("season", seasons)
+def test_can_not_mint_more_than_max_supply_nfts(season, contract_sold_out):
+    supply = config["season"][season]["max_supply"]
+    assert contract_sold_out.max_supply() == supply
+    assert contract_sold_out.totalSupply() == supply - 1
+    with reverts("All genesis NFTs minted"):
+        contract_sold_out.mint(
+            {"from": accounts[3], "value": contract_sold_out.mint_cost()}
+        )
@@ -1,5 +1,5 @@
 import pytest
-from brownie import Wei, accounts
+from brownie import Wei, accounts, reverts
 from common import contract
 
 from deploy import get_prereveal_json_folder, get_json_folder
@@ -49,3 +49,22 @@ def test_prereveal_URI(contract):
     assert get_json_folder() in contract.tokenURI(
         0
     ), "NFT json folder hash not found in URI"
+
+
+@pytest.mark.prereveal
+def test_set_base_URI(contract):
+    contract.mint(
+        {"from": accounts[1], "value": int(contract.mint_cost({"from": accounts[1]}))}
+    )
+    tx = contract.disablePrereveal({"from": accounts[0]})
+    assert tx.events["BaseURIChanged"]["base_uri"] == (
+        "https://ipfs.io/ipfs/" + get_json_folder() + "/"
+    )
+    base_uri = "https://metadata.poorapes.com/" + get_json_folder() + "/"
+    with reverts("Ownable: caller is not the owner"):
+        contract.setBaseURI(base_uri, {"from": accounts[1]})
+    with reverts("The base URI can not be empty"):
+        contract.setBaseURI("", {"from": accounts[0]})
+    tx = contract.setBaseURI(base_uri, {"from": accounts[0]})
+    assert tx.events["BaseURIChanged"]["base_uri"] == base_uri
+    assert contract.tokenURI(0) == base_uri + "0"
@@ -0,0 +1,80 @@
+import pytest
+from brownie import accounts, chain
+from brownie.exceptions import VirtualMachineError
+
+from common import contract
+from price_oracle import (
+    get_price_feed,
+    set_btc_price,
+    expire_btc_price_cache,
+    replay_btc_prices,
+)
+
+# (seconds since the previous price, usd price), each scenario run on the
+# same deployment. The steps are at least the cache window (10 minutes)
+# apart, so mint sees every price.
+scenarios = {
+    "rally": [(0, 18000), (900, 19500), (900, 19999), (900, 20000), (900, 25000)],
+    "crash": [(0, 31000), (900, 24000), (900, 20001), (900, 16000)],
+    "flat_at_the_gate": [(0, 20000), (3600, 20000), (86400, 20000)],
+}
+
+
+def try_mint(contract, usd_price):
+    try:
+        contract.mint({"from": accounts[2], "value": contract.mint_cost()})
+    except VirtualMachineError as error:
+        return error.revert_msg
+    return None
+
+
+def expected_result(usd_price):
+    if usd_price < 20000:
+        return None
+    return "BTC is not under 20k usd"
+
+
+@pytest.mark.mint
+def test_set_btc_price_starts_a_new_round(contract):
+    price_feed = get_price_feed(contract)
+    first_round = price_feed.latestRound()
+    updated_at = chain.time() - 3600
+    round_id = set_btc_price(contract, 23456, updated_at)
+    assert round_id == first_round + 1
+    assert contract.getBTCPrice() == 23456 * 10**8
+    assert price_feed.latestRoundData() == (
+        round_id,
+        23456 * 10**8,
+        updated_at,
+        updated_at,
+        round_id,
+    )
+    # Earlier rounds are left as they were
+    assert price_feed.getAnswer(first_round) == 19000 * 10**8
+
+
+@pytest.mark.mint
+def test_set_btc_price_can_overwrite_a_round(contract):
+    price_feed = get_price_feed(contract)
+    round_id = price_feed.latestRound()
+    assert set_btc_price(contract, 21000, round_id=round_id) == round_id
+    assert price_feed.getAnswer(round_id) == 21000 * 10**8
+
+
+@pytest.mark.mint
+def test_mint_gate_across_price_scenarios(contract):
+    for name, prices in scenarios.items():
+        expire_btc_price_cache(contract)
+        results = replay_btc_prices(contract, prices, try_mint)
+        assert results == [expected_result(price) for _, price in prices], name
+        assert contract.getBTCPrice() == prices[-1][1] * 10**8
+        chain.revert()
+
+
+@pytest.mark.mint
+def test_mint_keeps_the_cached_price_between_rounds(contract):
+    # Prices a minute apart are all inside the first price's cache window
+    prices = [(0, 19000), (60, 25000), (60, 26000)]
+    assert replay_btc_prices(contract, prices, try_mint) == [None, None, None]
+    expire_btc_price_cache(contract)
+    assert try_mint(contract, 26000) == "BTC is not under 20k usd"
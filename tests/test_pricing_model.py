@@ -0,0 +1,162 @@
+import random
+import pytest
+from brownie import accounts, chain
+from brownie.exceptions import VirtualMachineError
+from hypothesis import settings, strategies as st
+from hypothesis.stateful import (
+    RuleBasedStateMachine,
+    invariant,
+    rule,
+    run_state_machine_as_test,
+)
+
+import pricing_model
+from common import season, contract_with_free_mints
+from deploy import get_max_supply, price_normal_as_wei, price_wl_as_wei
+
+# Thousands of action sequences are run against the pure-Python pricing
+# model, then a sample of them is replayed on the chain (step by step, with
+# the model alongside) to check the two agree.
+
+# Index 0 is the owner, who can't be whitelisted
+actors = [0, 2, 3, 4, 5]
+free_mints = ["accessories", "accommodation"]
+payments = ["exact", "short", "extra"]
+replayed_runs = 10
+recorded_runs = []
+
+
+def get_value(state, actor, num_nfts, payment):
+    cost, revert_msg = pricing_model.get_mint_cost(state, actor, num_nfts)
+    if revert_msg:
+        return state["mint_price"] * num_nfts
+    if payment == "short" and cost > 0:
+        return cost - 1
+    if payment == "extra":
+        return cost + 1
+    return cost
+
+
+def apply_action(state, action, value):
+    if action[0] == "mint":
+        return pricing_model.mint(state, action[1], action[2], value)
+    if action[0] == "add_to_whitelist":
+        return pricing_model.add_to_whitelist(state, action[1])
+    if action[0] == "remove_from_whitelist":
+        return pricing_model.remove_from_whitelist(state, action[1])
+    return pricing_model.mint_free_mint(state, action[1], action[2])
+
+
+def send_action(contract, free_mint_contracts, action, value):
+    account = accounts[action[1]]
+    try:
+        if action[0] == "mint":
+            contract.mint(action[2], {"from": account, "value": value})
+        elif action[0] == "add_to_whitelist":
+            contract.addToWhiteList(account, {"from": accounts[0]})
+        elif action[0] == "remove_from_whitelist":
+            contract.removeFromWhiteList(account, {"from": accounts[0]})
+        else:
+            free_mint_contracts[action[2]].mint({"from": account})
+    except VirtualMachineError as error:
+        return error.revert_msg
+    return None
+
+
+class MintPricing(RuleBasedStateMachine):
+    def __init__(self):
+        super().__init__()
+        self.state = pricing_model.new_state(
+            0,
+            get_max_supply("chicago"),
+            int(price_normal_as_wei("chicago")),
+            int(price_wl_as_wei("chicago")),
+        )
+        self.actions = []
+        recorded_runs.append(self.actions)
+
+    def do(self, action, payment="exact"):
+        value = 0
+        if action[0] == "mint":
+            value = get_value(self.state, action[1], action[2], payment)
+        self.actions.append((action, payment))
+        apply_action(self.state, action, value)
+
+    @rule(actor=st.sampled_from(actors))
+    def add_to_whitelist(self, actor):
+        self.do(("add_to_whitelist", actor))
+
+    @rule(actor=st.sampled_from(actors))
+    def remove_from_whitelist(self, actor):
+        self.do(("remove_from_whitelist", actor))
+
+    @rule(actor=st.sampled_from(actors), free_mint=st.sampled_from(free_mints))
+    def mint_free_mint(self, actor, free_mint):
+        self.do(("mint_free_mint", actor, free_mint))
+
+    @rule(
+        actor=st.sampled_from(actors),
+        num_nfts=st.integers(min_value=1, max_value=6),
+        payment=st.sampled_from(payments),
+    )
+    def mint(self, actor, num_nfts, payment):
+        self.do(("mint", actor, num_nfts), payment)
+
+    @invariant()
+    def discount_is_only_used_once(self):
+        for address in self.state["used"]:
+            assert pricing_model.get_tier(self.state, address) == "normal"
+
+    @invariant()
+    def supply_only_passes_the_cap_by_the_last_batch(self):
+        assert self.state["total_supply"] <= (
+            self.state["max_supply"] - 2 + pricing_model.max_batch
+        )
+
+    @invariant()
+    def the_owner_is_never_whitelisted(self):
+        assert 0 not in self.state["listed"]
+
+
+def replay(contract, free_mint_contracts, actions):
+    state = pricing_model.new_state(
+        0, contract.max_supply(), contract.mint_price(), contract.mint_price_whitlist()
+    )
+    for step, (action, payment) in enumerate(actions):
+        value = 0
+        if action[0] == "mint":
+            value = get_value(state, action[1], action[2], payment)
+        expected = apply_action(state, action, value)
+        actual = send_action(contract, free_mint_contracts, action, value)
+        assert actual == expected, (
+            "step " + str(step) + " " + str(action) + " " + str(actions[: step + 1])
+        )
+    assert contract.totalSupply() == state["total_supply"]
+    for actor in actors:
+        account = accounts[actor]
+        assert contract.balanceOf(account) == state["balances"].get(actor, 0)
+        assert contract.whitelist_used(account) == (actor in state["used"])
+        for num_nfts in range(1, 7):
+            cost, revert_msg = pricing_model.get_mint_cost(state, actor, num_nfts)
+            try:
+                assert contract.mint_cost(num_nfts, {"from": account}) == cost
+            except VirtualMachineError as error:
+                assert error.revert_msg == revert_msg
+
+
+@pytest.mark.whitelist
+@pytest.mark.whitelist_free_mints
+def test_pricing_model_matches_the_contract(contract_with_free_mints):
+    contract, accessories, accommodation = contract_with_free_mints
+    del recorded_runs[:]
+    run_state_machine_as_test(
+        MintPricing,
+        settings=settings(max_examples=1000, stateful_step_count=25, deadline=None),
+    )
+    runs = [actions for actions in recorded_runs if actions]
+    assert len(runs) > replayed_runs
+    free_mint_contracts = {"accessories": accessories, "accommodation": accommodation}
+    for actions in random.Random(0).sample(runs, replayed_runs):
+        replay(contract, free_mint_contracts, actions)
+        # Back to the freshly deployed contracts for the next run
+        chain.revert()
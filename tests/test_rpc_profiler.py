@@ -0,0 +1,72 @@
+import json
+import rlp
+import pytest
+from brownie import accounts, web3
+
+import rpc_profiler
+from common import contract
+
+
+@pytest.fixture
+def profiled():
+    installed = "rpc_profiler" not in web3.middleware_onion
+    rpc_profiler.install(web3)
+    saved = dict(rpc_profiler.profile)
+    rpc_profiler.profile["tests"] = {}
+    yield rpc_profiler.profile["tests"]
+    rpc_profiler.profile.update(saved)
+    if installed:
+        web3.middleware_onion.remove("rpc_profiler")
+
+
+def test_requests_are_split_by_phase():
+    assert rpc_profiler.get_phase("eth_sendTransaction", [{"from": "0x1"}]) == "deploy"
+    assert rpc_profiler.get_phase("eth_sendTransaction", [{"to": "0x2"}]) == "transact"
+    # Signed by a local account (e.g. the owner on a live network)
+    legacy_deploy = (
+        "0x" + rlp.encode([0, 10**9, 10**6, b"", 0, b"\x60", 27, 1, 2]).hex()
+    )
+    typed_transfer = (
+        "0x02"
+        + rlp.encode([1, 0, 1, 10**9, 21000, b"\x22" * 20, 1, b"", [], 0, 1, 2]).hex()
+    )
+    assert rpc_profiler.get_phase("eth_sendRawTransaction", [legacy_deploy]) == "deploy"
+    assert (
+        rpc_profiler.get_phase("eth_sendRawTransaction", [typed_transfer]) == "transact"
+    )
+    assert rpc_profiler.get_phase("eth_call", []) == "call"
+    assert rpc_profiler.get_phase("eth_getTransactionReceipt", []) == "wait"
+    assert rpc_profiler.get_phase("web3_clientVersion", []) == "other"
+
+
+def test_profiler_counts_a_mint(contract, profiled):
+    rpc_profiler.start("mint", "call")
+    contract.mint({"from": accounts[2], "value": contract.mint_price()})
+    rpc_profiler.start(None, None)
+    test = profiled["mint"]
+    assert test["phases"]["transact"]["requests"] == 1
+    assert test["phases"]["call"]["requests"] >= 1
+    assert test["methods"]["eth_sendTransaction"] == 1
+    assert test["stages"]["call"]["requests"] == rpc_profiler.get_requests(test)
+    assert test["stages"]["setup"]["requests"] == 0
+    report = "\n".join(rpc_profiler.get_report())
+    assert "eth_sendTransaction: 1" in report
+    assert "mint" in report
+
+
+def test_worker_profiles_are_merged(profiled, tmp_path):
+    rpc_profiler.start("a", "call")
+    rpc_profiler.record("eth_call", [], 0.5)
+    rpc_profiler.start(None, None)
+    worker = rpc_profiler.new_test()
+    worker["stages"]["setup"] = {"requests": 2, "time": 1.0}
+    worker["phases"]["deploy"] = {"requests": 2, "time": 1.0}
+    worker["methods"]["eth_sendTransaction"] = 2
+    worker_path = str(tmp_path / "profile.json.gw1")
+    with open(worker_path, "w") as worker_file:
+        json.dump({"a": worker, "b": worker}, worker_file)
+    rpc_profiler.merge_json(worker_path)
+    assert sorted(profiled) == ["a", "b"]
+    assert rpc_profiler.get_requests(profiled["a"]) == 3
+    assert profiled["a"]["methods"] == {"eth_call": 1, "eth_sendTransaction": 2}
+    assert profiled["b"]["phases"]["deploy"]["requests"] == 2
@@ -0,0 +1,80 @@
+import threading
+import pytest
+from brownie import accounts, web3
+
+from common import contract
+from tx_engine import new_engine, submit, bump, wait_for_all, get_fees
+
+
+def set_mining(on):
+    web3.provider.make_request("miner_start" if on else "miner_stop", [])
+
+
+@pytest.mark.tx_engine
+def test_fees_cover_the_base_fee(contract):
+    fees = get_fees()
+    base_fee = web3.eth.get_block("latest").get("baseFeePerGas", 0)
+    assert fees["priority_fee"] > 0
+    assert fees["max_fee"] >= base_fee + fees["priority_fee"]
+
+
+@pytest.mark.tx_engine
+def test_engine_tracks_nonces_and_replaces_stuck_transactions(contract):
+    engine = new_engine(accounts[0])
+    first_nonce = accounts[0].nonce
+    set_mining(False)
+    try:
+        entries = [
+            submit(engine, contract.addToWhiteList, account, gas_limit=100000)
+            for account in accounts[2:7]
+        ]
+        bump(engine, entries[2])
+        assert entries[2]["txids"][0] != entries[2]["txids"][1]
+        assert contract.isInWhiteList(accounts[2]) == False
+    finally:
+        set_mining(True)
+    receipts = wait_for_all(engine, poll_interval=0.1)
+    assert [entry["nonce"] for entry in entries] == list(
+        range(first_nonce, first_nonce + 5)
+    )
+    assert len(receipts) == 5
+    # The replacement is the one that was mined
+    assert receipts[2]["transactionHash"] == entries[2]["txids"][1]
+    assert accounts[0].nonce == first_nonce + 5
+    assert all(contract.isInWhiteList(account) for account in accounts[2:7])
+
+
+# Mining is paused for a while, so waiting has to bump the fees by itself
+@pytest.mark.tx_engine
+def test_engine_bumps_while_waiting(contract):
+    engine = new_engine(accounts[0], bump_after=0.2)
+    set_mining(False)
+    timer = threading.Timer(1, set_mining, [True])
+    timer.start()
+    try:
+        entry = submit(engine, contract.disablePrereveal, gas_limit=100000)
+        first_fees = dict(entry["fees"])
+        receipts = wait_for_all(engine, timeout=30, poll_interval=0.1)
+    finally:
+        timer.join()
+        set_mining(True)
+    assert len(entry["txids"]) > 1
+    assert entry["fees"]["max_fee"] > first_fees["max_fee"]
+    assert receipts[0]["transactionHash"] in entry["txids"]
+    assert contract.prereveal() == False
+
+
+@pytest.mark.tx_engine
+def test_bump_keeps_the_original_if_it_was_mined_first(contract):
+    engine = new_engine(accounts[0])
+    # Mining is on, so the original is mined before the bump is sent and the
+    # node turns the bump down
+    entry = submit(engine, contract.addToWhiteList, accounts[2], gas_limit=100000)
+    first_fees = dict(entry["fees"])
+    bump(engine, entry)
+    assert len(entry["txids"]) == 1
+    assert entry["receipt"]["transactionHash"] == entry["txids"][0]
+    assert entry["fees"] == first_fees
+    receipts = wait_for_all(engine, poll_interval=0.1)
+    assert receipts == [entry["receipt"]]
+    assert contract.isInWhiteList(accounts[2]) == True
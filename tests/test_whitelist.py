@@ -110,3 +110,27 @@ def test_being_on_the_wl_only_works_for_two_mints(contract):
         contract.mint(2, {"from": accounts[1], "value": wl_mint_price})
     # But can mint for normal prices
     contract.mint(2, {"from": accounts[1], "value": mint_price})
+
+
+@pytest.mark.whitelist
+def test_add_and_remove_many_from_whitelist(contract):
+    buyers = [accounts[2], accounts[3], accounts[4]]
+    contract.addManyToWhiteList(buyers, {"from": accounts[0]})
+    for buyer in buyers:
+        assert contract.isInWhiteList(buyer) == True, (
+            "account " + str(buyer) + " should be on the white list"
+        )
+    contract.removeManyFromWhiteList(buyers[:2], {"from": accounts[0]})
+    assert contract.isInWhiteList(buyers[0]) == False
+    assert contract.isInWhiteList(buyers[1]) == False
+    assert contract.isInWhiteList(buyers[2]) == True
+
+
+@pytest.mark.whitelist
+def test_add_many_to_whitelist_checks_every_address(contract):
+    with reverts("The owner can not be added to the whitelist"):
+        contract.addManyToWhiteList([accounts[2], accounts[0]], {"from": accounts[0]})
+    with reverts():
+        contract.addManyToWhiteList([accounts[2]], {"from": accounts[1]})
+    with reverts():
+        contract.removeManyFromWhiteList([accounts[2]], {"from": accounts[1]})
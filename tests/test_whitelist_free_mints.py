@@ -1,26 +1,13 @@
-import os
-import sys
 import pytest
-from brownie import accounts, reverts, FreeMint
+from brownie import accounts, reverts
 
-current_wd = os.path.dirname(os.path.realpath(__file__))
-scripts_path = os.path.join(current_wd, os.path.join("..", "scripts"))
-sys.path.append(scripts_path)
-
-from deploy import deploy_poor_apes_contract
-
-
-def mint_all_three_contracts():
-    accessories = FreeMint.deploy({"from": accounts[0]})
-    accommodation = FreeMint.deploy({"from": accounts[0]})
-    contract = deploy_poor_apes_contract(19000, "chicago", accessories, accommodation)
-    return [contract, accessories, accommodation]
+from common import season, contract_with_free_mints
 
 
 @pytest.mark.whitelist_free_mints
-def test_own_both_free_mints_Minting_accessoires_first():
+def test_own_both_free_mints_Minting_accessoires_first(contract_with_free_mints):
     account = accounts[5]
-    contract, accessories, accommodation = mint_all_three_contracts()
+    contract, accessories, accommodation = contract_with_free_mints
     assert contract.ownsBothFreeMints(account) == False, (
         "account "
         + str(account)
@@ -37,9 +24,9 @@ def test_own_both_free_mints_Minting_accessoires_first():
 
 
 @pytest.mark.whitelist_free_mints
-def test_own_both_free_mints_Minting_accommodation_first():
+def test_own_both_free_mints_Minting_accommodation_first(contract_with_free_mints):
     account = accounts[6]
-    contract, accessories, accommodation = mint_all_three_contracts()
+    contract, accessories, accommodation = contract_with_free_mints
     assert contract.ownsBothFreeMints(account) == False, (
         "account "
         + str(account)
@@ -56,9 +43,9 @@ def test_own_both_free_mints_Minting_accommodation_first():
 
 
 @pytest.mark.whitelist_free_mints
-def test_free_mint_wl_has_precedence_over_normal_wl():
+def test_free_mint_wl_has_precedence_over_normal_wl(contract_with_free_mints):
     account = accounts[7]
-    contract, accessories, accommodation = mint_all_three_contracts()
+    contract, accessories, accommodation = contract_with_free_mints
     accommodation.mint({"from": account})
     accessories.mint({"from": account})
     contract.addToWhiteList(account, {"from": accounts[0]})
@@ -78,9 +65,9 @@ def test_free_mint_wl_has_precedence_over_normal_wl():
 
 
 @pytest.mark.whitelist_free_mints
-def test_minting_when_account_has_both_free_mints():
+def test_minting_when_account_has_both_free_mints(contract_with_free_mints):
     account = accounts[8]
-    contract, accessories, accommodation = mint_all_three_contracts()
+    contract, accessories, accommodation = contract_with_free_mints
     accommodation.mint({"from": account})
     accessories.mint({"from": account})
     # 1. Check can't mint more then two
@@ -1,26 +1,31 @@
 import pytest
-from brownie import accounts, config, reverts
+from brownie import accounts, reverts
 
-from common import contract
+from common import (
+    season,
+    contract_for_season,
+    contract_sold_out,
+    contract_almost_sold_out,
+)
+from deploy import seasons
 
 
-chicago_supply = config["season"]["chicago"]["max_supply"]
+def mint_last_nft(contract):
+    contract.mint({"from": accounts[3], "value": int(contract.mint_cost())})
 
 
 @pytest.mark.withdraw
 @pytest.mark.long
-def test_owner_withdraw(contract):
+@pytest.mark.parametrize("season", seasons)
+def test_owner_withdraw(contract_for_season, contract_almost_sold_out):
     # Can't withdraw at the begining of the mint
     with reverts("Mint has not finished"):
-        contract.withdraw_owner({"from": accounts[0]})
-    for x in range(chicago_supply - 2):
-        contract.mint({"from": accounts[x], "value": int(contract.mint_cost())})
+        contract_for_season.withdraw_owner({"from": accounts[0]})
+    contract = contract_almost_sold_out
     # Can't withdraw before the mint has finished
     with reverts("Mint has not finished"):
         contract.withdraw_owner({"from": accounts[0]})
-    contract.mint(
-        {"from": accounts[chicago_supply - 1], "value": int(contract.mint_cost())}
-    )
+    mint_last_nft(contract)
     # Marketing needs to withdraw before the Owner
     with reverts("Marketing needs to withdraw first"):
         contract.withdraw_owner({"from": accounts[0]})
@@ -28,21 +33,19 @@ def test_owner_withdraw(contract):
 
 @pytest.mark.withdraw
 @pytest.mark.long
-def test_marketing_withdraw(contract):
+@pytest.mark.parametrize("season", seasons)
+def test_marketing_withdraw(contract_for_season, contract_almost_sold_out):
     # The owner can't withdraw from the withdraw_marketing function
     with reverts("Only marketing can call this function"):
-        contract.withdraw_marketing({"from": accounts[0]})
+        contract_for_season.withdraw_marketing({"from": accounts[0]})
     # Even if marketing calls the withdraw_marketing function the mint has to finish
     with reverts("Mint has to finish"):
-        contract.withdraw_marketing({"from": accounts[1]})
-    for x in range(chicago_supply - 2):
-        contract.mint({"from": accounts[x], "value": int(contract.mint_cost())})
+        contract_for_season.withdraw_marketing({"from": accounts[1]})
+    contract = contract_almost_sold_out
     # One more NFT has to be minted before marketing can call withdraw_marketing
     with reverts("Mint has to finish"):
         contract.withdraw_marketing({"from": accounts[1]})
-    contract.mint(
-        {"from": accounts[chicago_supply - 1], "value": int(contract.mint_cost())}
-    )
+    mint_last_nft(contract)
     # Owner still can't call widraw_marketing
     with reverts("Only marketing can call this function"):
         contract.withdraw_marketing({"from": accounts[0]})
@@ -58,10 +61,9 @@ def test_marketing_withdraw(contract):
 
 @pytest.mark.withdraw
 @pytest.mark.long
-def test_marketing_withdrawing_twice(contract):
-    for x in range(chicago_supply - 1):
-        print(x)
-        contract.mint({"from": accounts[x], "value": int(contract.mint_cost())})
+@pytest.mark.parametrize("season", seasons)
+def test_marketing_withdrawing_twice(contract_sold_out):
+    contract = contract_sold_out
     contract.withdraw_marketing({"from": accounts[1]})
     marketing_balance = accounts[1].balance()
     with reverts("Marketing has already withdrawn"):
@@ -75,11 +77,10 @@ def test_marketing_withdrawing_twice(contract):
 
 @pytest.mark.withdraw
 @pytest.mark.long
-def test_marketing_withdraw_and_then_owner_withdraw(contract):
+@pytest.mark.parametrize("season", seasons)
+def test_marketing_withdraw_and_then_owner_withdraw(contract_sold_out):
+    contract = contract_sold_out
     owner_balance = accounts[0].balance()
-    for x in range(chicago_supply - 1):
-        print(x)
-        contract.mint({"from": accounts[x], "value": int(contract.mint_cost())})
     # Just double checking
     with reverts("Marketing needs to withdraw first"):
         contract.withdraw_owner({"from": accounts[0]})